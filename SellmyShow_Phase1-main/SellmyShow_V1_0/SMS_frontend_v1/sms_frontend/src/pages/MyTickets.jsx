@@ -39,6 +39,25 @@ function MyTickets() {
     }
   };
 
+  // Ticket files need auth, which a plain link cannot send: get a short-lived
+  // signed link from the backend and open that instead
+  const openTicketFile = async (ticketUrl) => {
+    const tab = window.open('', '_blank'); // opened now, so the popup blocker allows it
+    try {
+      const res = await axios.get('/upload-link', { params: { path: ticketUrl } });
+      const url = `${axios.defaults.baseURL}${res.data.url}`;
+      if (tab) {
+        tab.location.href = url;
+      } else {
+        window.location.href = url;
+      }
+    } catch (err) {
+      if (tab) tab.close();
+      console.error('Failed to open ticket file', err);
+      alert('Could not open the ticket file');
+    }
+  };
+
   const goToHome = () => {
     window.location.href = '/';
   };
@@ -64,9 +83,11 @@ function MyTickets() {
       <p>
         <strong>File:</strong>{' '}
         <a
-          href={`http://192.168.0.102:5000${ticket.ticket_url}`}
-          target="_blank"
-          rel="noreferrer"
+          href={ticket.ticket_url}
+          onClick={(e) => {
+            e.preventDefault();
+            openTicketFile(ticket.ticket_url);
+          }}
         >
           View Ticket
         </a>
@@ -1,50 +1,120 @@
-from flask import Flask, send_from_directory
+from flask import Flask, request, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
+import time
 from utils.auth_utils import token_required
+from utils.json_provider import FastJSONProvider
+from utils.file_serving import upload_response, signed_upload_url, has_valid_signature, clean_key
+from utils.storage import UPLOAD_FOLDER, PUBLIC_PREFIX
+from utils.metrics import init_metrics
+from utils.logging_setup import init_logging
+from utils.query_profiler import init_query_profiler
+from utils.request_profiler import init_request_profiler
+from utils.archive import init_archiver
+
+# Route to serve uploaded files (auth here, transfer optionally offloaded to the proxy):
+# a bearer token, or a link signed by /upload-link for plain <a>/<img> use
+def uploaded_file(filename):
+    if has_valid_signature(filename, request.args):
+        return upload_response(filename)
+    return authenticated_upload(filename)
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-
-# Configurations
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max upload size
-
-# Create uploads folder if not exists
-if not os.path.exists(app.config['UPLOAD_FOLDER']):
-    os.makedirs(app.config['UPLOAD_FOLDER'])
-
-# Register blueprints
-from routes.request_otp import req_otp
-from routes.tickets import tickets
-from routes.auth import auth
-from routes.my_tickets import my_tickets
-from routes.admin import admin_tickets
-from routes.checkout import checkout_bp
-from routes.cinemas import cinema
-from routes.edit_profile import profile
-from routes.filter import filter_bp
-from routes.upload2 import upload2
-
-app.register_blueprint(filter_bp)
-app.register_blueprint(checkout_bp)
-app.register_blueprint(tickets)
-app.register_blueprint(auth)
-app.register_blueprint(my_tickets)
-app.register_blueprint(admin_tickets, url_prefix='/admin')
-app.register_blueprint(cinema)
-app.register_blueprint(profile)
-app.register_blueprint(upload2)
-app.register_blueprint(req_otp)
-
-
-
-# Route to serve uploaded files
 @token_required
-@app.route('/uploads/<filename>')
-def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+def authenticated_upload(filename):
+    return upload_response(filename)
+
+# Short-lived link to an upload: /upload-link?path=/uploads/ab/cd/<digest>.png
+@token_required
+def upload_link():
+    path = request.args.get('path', '')
+    if not path.startswith('/uploads/'):
+        return jsonify({'error': 'path must be an /uploads/ URL'}), 400
+    key = clean_key(path[len('/uploads/'):], public=False)
+    if key is None:
+        return jsonify({'error': 'File not found'}), 404
+    return jsonify({'url': signed_upload_url(key)}), 200
+
+# Mirrored movie posters are public (see utils/poster_mirror.py)
+def poster_file(filename):
+    return upload_response(PUBLIC_PREFIX + filename, public=True)
+
+
+# App factory. Nothing here talks to MongoDB, Gemini, Tesseract or Razorpay:
+# those are created on first use (utils/db.py, utils/clients.py), so a worker
+# boots in the time it takes to import Flask and the blueprints.
+def create_app():
+    started = time.perf_counter()
+
+    app = Flask(__name__)
+    init_logging(app)  # JSON logs with request ids, see utils/logging_setup.py
+    CORS(app)  # Enable CORS for all routes
+
+    # Behind nginx / a load balancer: trust that many X-Forwarded-For hops, so
+    # request.remote_addr (and the per-IP rate limits) see the real client
+    proxy_count = int(os.getenv('PROXY_COUNT', 0))
+    if proxy_count:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_count, x_proto=proxy_count)
+
+    # Configurations
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER  # local blob store root, see utils/storage.py
+    app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max upload size
+    app.config['UPLOAD_SERVE_MODE'] = os.getenv('UPLOAD_SERVE_MODE', 'flask')  # flask | sendfile | accel
+    app.config['UPLOAD_ACCEL_PREFIX'] = os.getenv('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+    app.config['UPLOAD_CACHE_SECONDS'] = int(os.getenv('UPLOAD_CACHE_SECONDS', 86400))
+    app.config['USE_X_SENDFILE'] = app.config['UPLOAD_SERVE_MODE'] == 'sendfile'
+    app.config['JSON_BACKEND'] = os.getenv('JSON_BACKEND', 'orjson')  # or 'stdlib'
+
+    # Faster JSON for every jsonify() call (orjson with a stdlib fallback)
+    app.json = FastJSONProvider(app)
+
+    # Create uploads folder if not exists
+    if not os.path.exists(app.config['UPLOAD_FOLDER']):
+        os.makedirs(app.config['UPLOAD_FOLDER'])
+
+    # Register blueprints
+    from routes.request_otp import req_otp
+    from routes.tickets import tickets
+    from routes.auth import auth
+    from routes.my_tickets import my_tickets
+    from routes.admin import admin_tickets
+    from routes.checkout import checkout_bp
+    from routes.cinemas import cinema
+    from routes.edit_profile import profile
+    from routes.filter import filter_bp
+    from routes.upload2 import upload2
+    from routes.home import home
+
+    app.register_blueprint(filter_bp)
+    app.register_blueprint(checkout_bp)
+    app.register_blueprint(tickets)
+    app.register_blueprint(auth)
+    app.register_blueprint(my_tickets)
+    app.register_blueprint(admin_tickets, url_prefix='/admin')
+    app.register_blueprint(cinema)
+    app.register_blueprint(profile)
+    app.register_blueprint(upload2)
+    app.register_blueprint(req_otp)
+    app.register_blueprint(home)
+
+    app.add_url_rule('/uploads/<path:filename>', view_func=uploaded_file)
+    app.add_url_rule('/upload-link', view_func=upload_link)
+    app.add_url_rule('/posters/<path:filename>', view_func=poster_file)
+
+    # Request timing and the Prometheus /metrics endpoint
+    init_metrics(app)
+    # Sampled per-request Mongo profile (off unless QUERY_PROFILE_SAMPLE_RATE > 0)
+    init_query_profiler(app)
+    # CPU/allocation reports for requests sent with X-Profile (off unless configured)
+    init_request_profiler(app)
+    # Background move of old sold/deleted tickets to tickets_archive (ARCHIVE_INTERVAL_SECONDS=0 turns it off)
+    init_archiver(app)
+
+    app.config['STARTUP_SECONDS'] = time.perf_counter() - started
+    return app
+
+
+app = create_app()
 
 # Run the app
 if __name__ == '__main__':
@@ -0,0 +1,128 @@
+# JSON serialisation benchmark for the app-wide provider.
+#
+# Builds payloads shaped like /tickets, /my-tickets and /admin/tickets responses
+# and times Flask's stock provider against FastJSONProvider (orjson and stdlib).
+#
+#   python benchmarks/bench_json.py --rows 500 --repeat 200
+
+import argparse
+import os
+import random
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.json_provider import FastJSONProvider, orjson
+
+MOVIES = ['Coolie', 'Thug Life', 'Good Bad Ugly', 'Retro', 'Kantara Chapter 1', 'Superman']
+CITIES = ['Chennai', 'Coimbatore', 'Bengaluru', 'Madurai', 'Hyderabad']
+
+
+def make_ticket(i, sold=False):
+    created = datetime(2025, 7, 1) + timedelta(minutes=37 * i)
+    count = random.randint(1, 4)
+    ticket = {
+        '_id': str(uuid.uuid4()),
+        'user_id': str(ObjectId()),
+        'sold_by': str(ObjectId()),
+        'bought_by': str(ObjectId()) if sold else None,
+        'is_sold': sold,
+        'city': random.choice(CITIES),
+        'event_name': random.choice(MOVIES),
+        'venue': 'PVR: Grand Galada, Pallavaram - Screen 3 (Dolby Atmos)',
+        'datetime': (created + timedelta(days=3)).isoformat(),
+        'original_price': 190,
+        'selling_price': random.randint(120, 400),
+        'contact_info': '98' + str(random.randint(10000000, 99999999)),
+        'ticket_url': f"/uploads/{uuid.uuid4().hex}_ticket.png",
+        'poster_url': 'https://assets-in.bmscdn.com/discovery-catalog/events/tr:w-400,h-600,bg-CCCCCC/et00123456-abcdefghij-portrait.jpg',
+        'seat_numbers': [f"H{n}" for n in range(10, 10 + count)],
+        'count': count,
+        'created_at': created.isoformat(),
+        'deleted': False,
+    }
+    if sold:
+        ticket['sold_at'] = (created + timedelta(hours=5)).isoformat()
+        ticket['razorpay_order_id'] = 'order_' + uuid.uuid4().hex[:14]
+        ticket['razorpay_payment_id'] = 'pay_' + uuid.uuid4().hex[:14]
+    return ticket
+
+
+def build_payloads(rows):
+    # /tickets: public listing without private fields
+    listing = []
+    for i in range(rows):
+        t = make_ticket(i)
+        t.pop('ticket_url')
+        t.pop('contact_info')
+        listing.append(t)
+
+    # /my-tickets: a heavy seller's own tickets, _id renamed to ticket_id
+    mine = []
+    for i in range(rows):
+        t = make_ticket(i, sold=i % 3 == 0)
+        t['ticket_id'] = t.pop('_id')
+        mine.append(t)
+
+    # /admin/tickets: everything, including raw Mongo types
+    admin = []
+    for i in range(rows):
+        t = make_ticket(i, sold=i % 2 == 0)
+        t['ticket_id'] = t.pop('_id')
+        t['updated_at'] = datetime.utcnow()
+        t['moderator_id'] = ObjectId()
+        admin.append(t)
+
+    return {'/tickets': listing, '/my-tickets': mine, '/admin/tickets': admin}
+
+
+# Flask's stock provider can't encode ObjectId; give it the same fallback so the
+# comparison measures the encoder rather than failing on the admin payload.
+class StockProvider(DefaultJSONProvider):
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    random.seed(42)
+    payloads = build_payloads(args.rows)
+
+    providers = [('flask-default', Flask('stock'))]
+    providers[0][1].json = StockProvider(providers[0][1])
+
+    stdlib_app = Flask('stdlib')
+    stdlib_app.config['JSON_BACKEND'] = 'stdlib'
+    stdlib_app.json = FastJSONProvider(stdlib_app)
+    providers.append(('fast-stdlib', stdlib_app))
+
+    if orjson is not None:
+        orjson_app = Flask('orjson')
+        orjson_app.json = FastJSONProvider(orjson_app)
+        providers.append(('fast-orjson', orjson_app))
+    else:
+        print('orjson not installed, skipping fast-orjson')
+
+    print(f"{'payload':<16}{'provider':<16}{'ms/response':>12}{'bytes':>10}")
+    for route, data in payloads.items():
+        for name, flask_app in providers:
+            with flask_app.app_context():
+                body = flask_app.json.response(data).get_data()
+                seconds = timeit.timeit(lambda: flask_app.json.response(data), number=args.repeat)
+            print(f"{route:<16}{name:<16}{seconds / args.repeat * 1000:>12.3f}{len(body):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+# Shared by the benchmark scripts: the test login benchmarks/seed.py creates
+# (routes/request_otp.py answers it with a fixed OTP), and the guard that keeps
+# them from writing to anything but a local MongoDB.
+
+import os
+import sys
+from urllib.parse import urlsplit
+from dotenv import dotenv_values
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCAL_MONGO_HOSTS = ('localhost', '127.0.0.1', 'mongo')
+
+TEST_PHONE = "9364393901"
+TEST_OTP = "123456"
+
+
+# The MongoDB the app would use: MONGO_URI from the environment, else from .env
+def mongo_host():
+    uri = os.getenv('MONGO_URI') or dotenv_values(os.path.join(BACKEND_DIR, '.env')).get('MONGO_URI') or ''
+    return urlsplit(uri).hostname or ''
+
+
+def require_local_mongo(allow_remote, action):
+    host = mongo_host()
+    if host not in LOCAL_MONGO_HOSTS and not allow_remote:
+        sys.exit(f"Refusing to {action} {host or 'an unset MONGO_URI'}; pass --allow-remote if you mean it")
@@ -0,0 +1,161 @@
+# Home page load: the old fan-out (/tickets, /active-filters, /cinema-data and
+# /profile) against one GET /home, on a modelled mobile link.
+#
+#   python benchmarks/seed.py --users 200 --tickets 5000
+#   python benchmarks/home_bootstrap.py --start gthread --rtt-ms 150 --kbps 1600
+#
+# Every request is really sent to the server; its server time and compressed
+# size are measured. Time to first render is then modelled for a browser on a
+# cold connection: one RTT to connect, one per request, plus the bytes over the
+# link. The fan-out requests go out in parallel (a browser opens a connection
+# per request) and share the bandwidth, so they cost max(server time) plus the
+# transfer of every body. "home (repeat)" is a return visit that sends back the
+# section etags from the first response.
+
+import argparse
+import http.client
+import json
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit, quote
+
+from common import TEST_PHONE, TEST_OTP, require_local_mongo
+from loadtest import MODES, start_server, stop_server
+
+FANOUT = ['/tickets?view=card', '/active-filters', '/cinema-data']
+
+
+def fetch(url, path, token=None):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+    headers = {'Accept-Encoding': 'br, gzip'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    started = time.perf_counter()
+    conn.request('GET', path, headers=headers)
+    response = conn.getresponse()
+    body = response.read()
+    seconds = time.perf_counter() - started
+    conn.close()
+    if response.status != 200:
+        raise SystemExit(f"GET {path} returned {response.status}")
+    return seconds, len(body), response.getheader('Content-Encoding'), body
+
+
+def sign_in(url):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+    for path, body in (('/request-otp', {'phone_number': TEST_PHONE, 'source': 'login'}),
+                       ('/login', {'phone_number': TEST_PHONE, 'otp': TEST_OTP})):
+        conn.request('POST', path, body=json.dumps(body), headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        data = response.read()
+    conn.close()
+    return json.loads(data).get('token') if response.status == 200 else None
+
+
+# Load time on the modelled link: connect + request RTTs, server time, transfer
+def modelled_ms(server_seconds, size, rtt_ms, kbps):
+    return 2 * rtt_ms + server_seconds * 1000 + size * 8 / kbps
+
+
+def fanout_once(url, token, rtt_ms, kbps):
+    paths = FANOUT + (['/profile'] if token else [])
+    results = [None] * len(paths)
+
+    def one(i, path):
+        results[i] = fetch(url, path, token)
+
+    threads = [threading.Thread(target=one, args=(i, p)) for i, p in enumerate(paths)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    server = max(r[0] for r in results)
+    size = sum(r[1] for r in results)
+    return server, size, modelled_ms(server, size, rtt_ms, kbps)
+
+
+def home_once(url, token, rtt_ms, kbps, known=None):
+    path = '/home' + (f'?known={quote(known)}' if known else '')
+    server, size, _, body = fetch(url, path, token)
+    return server, size, modelled_ms(server, size, rtt_ms, kbps), body
+
+
+def known_from(body, encoding):
+    if encoding == 'br':
+        import brotli
+        body = brotli.decompress(body)
+    elif encoding == 'gzip':
+        import gzip
+        body = gzip.decompress(body)
+    sections = json.loads(body)
+    return ','.join(f"{name}:{s['etag']}" for name, s in sections.items() if 'etag' in s)
+
+
+def measure(url, runs, rtt_ms, kbps, signed_in):
+    token = sign_in(url) if signed_in else None
+    if signed_in and not token:
+        raise SystemExit("Sign-in failed, seed the test user with benchmarks/seed.py")
+
+    _, _, encoding, body = fetch(url, '/home', token)
+    known = known_from(body, encoding)
+
+    samples = {'fan-out': [], 'home': [], 'home (repeat)': []}
+    for _ in range(runs):
+        samples['fan-out'].append(fanout_once(url, token, rtt_ms, kbps))
+        samples['home'].append(home_once(url, token, rtt_ms, kbps)[:3])
+        samples['home (repeat)'].append(home_once(url, token, rtt_ms, kbps, known)[:3])
+
+    rows = []
+    for name, values in samples.items():
+        rows.append({
+            'scenario': name,
+            'server_ms': round(statistics.median(v[0] for v in values) * 1000, 1),
+            'bytes': int(statistics.median(v[1] for v in values)),
+            'modelled_ms': round(statistics.median(v[2] for v in values), 1),
+        })
+    return rows
+
+
+def print_report(rows):
+    print(f"{'scenario':<15} {'server ms':>10} {'bytes':>9} {'modelled ms':>12}")
+    for row in rows:
+        print(f"{row['scenario']:<15} {row['server_ms']:>10} {row['bytes']:>9} {row['modelled_ms']:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Home page fan-out vs GET /home')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--start', choices=sorted(MODES), help='launch gunicorn in this mode first')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--rtt-ms', type=float, default=150, help='round trip time of the modelled link')
+    parser.add_argument('--kbps', type=float, default=1600, help='bandwidth of the modelled link')
+    parser.add_argument('--signed-in', action='store_true', help='include /profile, signed in as the seeded test user')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--allow-remote', action='store_true', help='run even if MONGO_URI is not a local MongoDB')
+    args = parser.parse_args()
+    require_local_mongo(args.allow_remote, 'benchmark against')
+
+    server = None
+    url = args.url
+    if args.start:
+        server, url = start_server(args.start, args.port, {'RATE_LIMIT_ENABLED': '0', 'FAKE_GATEWAYS': '1'})
+    try:
+        rows = measure(url, args.runs, args.rtt_ms, args.kbps, args.signed_in)
+    finally:
+        if server:
+            stop_server(server)
+
+    print_report(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rtt_ms': args.rtt_ms, 'kbps': args.kbps, 'signed_in': args.signed_in, 'rows': rows}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
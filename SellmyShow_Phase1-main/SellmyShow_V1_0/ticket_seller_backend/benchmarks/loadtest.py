@@ -0,0 +1,167 @@
+# HTTP load test: throughput and latency percentiles for a running server, or a
+# side-by-side comparison of gunicorn worker models.
+#
+#   # against a server that is already up
+#   python benchmarks/loadtest.py --url http://127.0.0.1:5000 --path /tickets --concurrency 64
+#
+#   # start gunicorn once per mode (sync x4 is the old Dockerfile setup) and compare
+#   python benchmarks/loadtest.py --compare sync,gthread,gevent --path /tickets --path /active-filters
+#
+# Each client thread keeps one keep-alive connection and cycles through the
+# given paths until --duration runs out.
+
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Environment for each --compare mode, on top of the caller's environment
+MODES = {
+    'sync': {'GUNICORN_WORKER_CLASS': 'sync', 'WEB_CONCURRENCY': '4'},
+    'gthread': {'GUNICORN_WORKER_CLASS': 'gthread'},
+    'gevent': {'GUNICORN_WORKER_CLASS': 'gevent'},
+}
+
+# The API refuses to start without a JWT secret; any value does for a local run
+BENCHMARK_JWT_SECRET = 'benchmark-jwt-secret'
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def client_loop(host, port, paths, headers, deadline, latencies, errors, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    local_latencies, local_errors, i = [], 0, 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                local_errors += 1
+            else:
+                local_latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def run_load(url, paths, concurrency, duration, headers):
+    parts = urlsplit(url)
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client_loop, args=(parts.hostname, parts.port or 80, paths, headers, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0) * 1000,
+    }
+
+
+def wait_until_up(url, timeout=30):
+    parts = urlsplit(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            conn.request('GET', '/')  # any response means a worker is serving
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.3)
+    raise RuntimeError(f"gunicorn did not come up on {url}")
+
+
+def start_server(mode, port, extra_env=None):
+    env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_ACCESS_LOG='/dev/null', **MODES[mode])
+    env.setdefault('JWT_SECRET', BENCHMARK_JWT_SECRET)
+    env.update(extra_env or {})
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_up(url)
+    except Exception:
+        stop_server(server)
+        raise
+    return server, url
+
+
+def stop_server(server):
+    server.send_signal(signal.SIGTERM)
+    server.wait(timeout=30)
+
+
+def run_mode(mode, port, args, headers):
+    server, url = start_server(mode, port)
+    try:
+        run_load(url, args.path, args.concurrency, min(args.duration, 2), headers)  # warm-up
+        return run_load(url, args.path, args.concurrency, args.duration, headers)
+    finally:
+        stop_server(server)
+
+
+def print_row(name, result):
+    print(f"{name:<10}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+          f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--path', action='append', help='repeatable, default /tickets')
+    parser.add_argument('--header', action='append', default=[], help='"Name: value", repeatable')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--compare', help='comma-separated modes to start and test: ' + ','.join(MODES))
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+    args.path = args.path or ['/tickets']
+    headers = dict(h.split(':', 1) for h in args.header)
+    headers = {k.strip(): v.strip() for k, v in headers.items()}
+
+    print(f"{'mode':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    if not args.compare:
+        print_row('server', run_load(args.url, args.path, args.concurrency, args.duration, headers))
+        return
+    for mode in args.compare.split(','):
+        print_row(mode, run_mode(mode.strip(), args.port, args, headers))
+
+
+if __name__ == '__main__':
+    main()
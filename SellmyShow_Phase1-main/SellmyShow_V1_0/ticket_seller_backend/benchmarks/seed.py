@@ -0,0 +1,125 @@
+# Seed a MongoDB with synthetic users, movies and tickets for benchmarking.
+#
+#   MONGO_URI=mongodb://localhost:27017 python benchmarks/seed.py --users 2000 --tickets 50000
+#
+# Writes into ticket_db like the app does, so only point it at a throwaway
+# database (remote URIs are refused unless --allow-remote). Also creates the
+# test login 9364393901 (fixed OTP 123456) that benchmarks/traffic.py signs in as.
+
+import argparse
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.db import get_db
+from utils.movie_poster import normalise_name
+from common import TEST_PHONE, require_local_mongo
+
+MOVIES = ['Coolie', 'Thug Life', 'Good Bad Ugly', 'Retro', 'Kantara Chapter 1', 'Superman',
+          'Vidaamuyarchi', 'Dragon', 'Madharaasi', 'Lokah', 'War 2', 'Jurassic World Rebirth']
+CITIES = ['Chennai', 'Coimbatore', 'Bengaluru', 'Madurai', 'Hyderabad', 'Kochi']
+VENUES = ['PVR: Grand Galada, Pallavaram', 'INOX: Prozone Mall', 'AGS Cinemas: T Nagar',
+          'Broadway Cinemas', 'Rohini Silver Screens', 'Cinepolis: Nexus Vijaya']
+
+
+def poster_path(movie):
+    return f"/posters/bench/{normalise_name(movie).replace(' ', '-')}.webp"
+
+
+def make_user(i):
+    return {
+        '_id': ObjectId(),
+        'name': f'Bench User {i}',
+        'email': f'bench{i}@example.com',
+        'phone_number': f'9{i:09d}',
+        'upiId': f'bench{i}@upi',
+        'createdAt': datetime.utcnow(),
+        'updatedAt': datetime.utcnow()
+    }
+
+
+def make_ticket(rng, seller, buyer_ids, now):
+    created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+    count = rng.randint(1, 4)
+    sold = rng.random() < 0.3
+    movie = rng.choice(MOVIES)
+    return {
+        '_id': str(uuid.uuid4()),
+        'user_id': seller,
+        'sold_by': seller,
+        'bought_by': rng.choice(buyer_ids) if sold else None,
+        'is_sold': sold,
+        'sold_at': (created + timedelta(hours=rng.randint(1, 72))).isoformat() if sold else None,
+        'city': rng.choice(CITIES),
+        'event_name': movie,
+        'venue': f'{rng.choice(VENUES)} - Screen {rng.randint(1, 9)}',
+        'datetime': (created + timedelta(days=rng.randint(1, 10))).isoformat(),
+        'original_price': 190,
+        'selling_price': rng.randint(120, 400),
+        'contact_info': f'9{rng.randint(0, 999999999):09d}',
+        'ticket_url': '/uploads/00/00/' + uuid.uuid4().hex + '.jpg',
+        'poster_url': poster_path(movie),
+        'seat_numbers': [f'H{n}' for n in range(1, count + 1)],
+        'count': count,
+        'created_at': created.isoformat(),
+        'deleted': rng.random() < 0.02
+    }
+
+
+def seed(db, users=1000, tickets=20000, drop=True, seed_value=42, batch=5000):
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    names = ['users', 'tickets', 'movie_names', 'active_filters', 'otp_requests', 'reports']
+    if drop:
+        for name in names:
+            db[name].drop()
+
+    user_docs = [make_user(i) for i in range(users)]
+    user_docs.append({
+        '_id': ObjectId(), 'name': 'Test User', 'email': 'test@example.com', 'phone_number': TEST_PHONE,
+        'upiId': 'test@upi', 'createdAt': now, 'updatedAt': now
+    })
+    db['users'].insert_many(user_docs)
+    # request-otp only sends a login OTP to numbers that have requested one before
+    db['otp_requests'].insert_one({'phone_number': TEST_PHONE, 'otp_expiry': now})
+
+    db['movie_names'].insert_many([
+        {'name': movie, 'name_key': normalise_name(movie), 'poster_url': poster_path(movie), 'cities': CITIES}
+        for movie in MOVIES
+    ])
+
+    user_ids = [str(u['_id']) for u in user_docs]
+    written, open_pairs = 0, set()
+    while written < tickets:
+        docs = [make_ticket(rng, rng.choice(user_ids), user_ids, now) for _ in range(min(batch, tickets - written))]
+        db['tickets'].insert_many(docs, ordered=False)
+        open_pairs.update((d['event_name'], d['city']) for d in docs if not d['is_sold'] and not d['deleted'])
+        written += len(docs)
+
+    db['active_filters'].insert_one({
+        'movies': sorted({m for m, _ in open_pairs}),
+        'cities': sorted({c for _, c in open_pairs})
+    })
+    return {'users': len(user_docs), 'tickets': written, 'movies': len(MOVIES)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed ticket_db with synthetic data')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='add to existing data instead of dropping it')
+    parser.add_argument('--allow-remote', action='store_true')
+    args = parser.parse_args()
+
+    require_local_mongo(args.allow_remote, 'seed')
+
+    print(seed(get_db(), args.users, args.tickets, drop=not args.keep, seed_value=args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# Worker startup report.
+#
+# Imports the app in a fresh interpreter under `python -X importtime` and prints
+# the wall time of `import app`, create_app()'s own time, and where the import
+# time goes: every module's own (self) time, at any depth, added up per
+# third-party package (flask, pymongo, google, ...) and per module of the app
+# itself (routes.tickets, utils.metrics, ...), most expensive first. Self times
+# add up without counting a nested import twice.
+#
+#   python benchmarks/startup_report.py --top 15
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = (
+    "import time; t = time.perf_counter(); import app; "
+    "print('IMPORT_SECONDS', time.perf_counter() - t); "
+    "print('STARTUP_SECONDS', app.app.config['STARTUP_SECONDS'])"
+)
+
+# import time:       123 |       4567 |   package.module
+LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def run_probe():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+        env=dict(os.environ, JWT_SECRET=os.getenv('JWT_SECRET') or 'benchmark-jwt-secret')
+    )
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    return result.stdout, result.stderr
+
+
+# The app's own packages are broken down one level further (one row per blueprint)
+APP_PACKAGES = {'app', 'routes', 'utils'}
+
+
+def package_of(module):
+    parts = module.split('.')
+    return '.'.join(parts[:2]) if parts[0] in APP_PACKAGES else parts[0]
+
+
+def parse_importtime(stderr):
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, _, _, module = match.groups()
+            packages[package_of(module)] += int(self_us)
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    stdout, stderr = run_probe()
+    values = dict(line.split() for line in stdout.splitlines() if line.startswith(('IMPORT_', 'STARTUP_')))
+
+    print(f"import app       {float(values['IMPORT_SECONDS']) * 1000:8.1f} ms")
+    print(f"create_app()     {float(values['STARTUP_SECONDS']) * 1000:8.1f} ms")
+    print()
+    print(f"{'package':<32}{'self ms':>14}")
+    packages = parse_importtime(stderr)
+    for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<32}{us / 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
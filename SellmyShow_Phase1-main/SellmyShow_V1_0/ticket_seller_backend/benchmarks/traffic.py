@@ -0,0 +1,294 @@
+# Realistic traffic mix against the API, with per-route throughput and latency.
+#
+#   export MONGO_URI=mongodb://localhost:27017
+#   python benchmarks/seed.py --users 2000 --tickets 50000
+#   python benchmarks/traffic.py --start gthread --duration 60 --json bench.json
+#
+# --start launches gunicorn (see benchmarks/loadtest.py) with FAKE_GATEWAYS=1, so
+# Razorpay, Gemini and Tesseract are answered by utils/fake_gateways.py and the
+# run needs no network beyond the local MongoDB. Without --start it drives
+# whatever is at --url. Either way it writes, so like seed.py it refuses a
+# MONGO_URI that is not local unless --allow-remote is given.
+#
+# Every virtual user signs in once with the seeded test login (9364393901 /
+# 123456), then keeps picking a scenario by weight:
+#
+#   browse    GET /tickets with a random city/count/sort/view
+#   filters   GET /active-filters
+#   login     POST /request-otp + POST /login
+#   checkout  GET /ticket/<id> + POST /create-order/<id> (+ /verify-payment for a share)
+#   upload    POST /upload2 with a small generated image
+
+import argparse
+import hashlib
+import hmac
+import io
+import os
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+import http.client
+from collections import defaultdict
+from urllib.parse import urlsplit, urlencode
+
+from common import TEST_PHONE, TEST_OTP, require_local_mongo
+from loadtest import MODES, percentile, start_server, stop_server
+
+# Key secret checkout.verify_payment checks signatures against. --start hands
+# these to the server; against a running server export its RAZORPAY_KEY_SECRET
+RAZORPAY_TEST_KEY_ID = "rzp_test_benchmark"
+RAZORPAY_TEST_SECRET = os.getenv("RAZORPAY_KEY_SECRET") or "traffic-benchmark-secret"
+
+SCENARIOS = ('browse', 'filters', 'login', 'checkout', 'upload')
+DEFAULT_MIX = 'browse=60,filters=15,login=5,checkout=15,upload=5'
+CITIES = ['Chennai', 'Coimbatore', 'Bengaluru', 'Madurai', 'Hyderabad', 'Kochi']
+SORTS = ['', 'price_asc', 'price_desc', 'date_asc', 'date_desc']
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def make_image():
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 360), (200, 30, 60)).save(buffer, 'JPEG', quality=80)
+    return buffer.getvalue()
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                   f'Content-Type: {content_type}\r\n\r\n'.encode())
+        body.write(content + b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route, status, seconds):
+        with self.lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][status] += 1
+
+    def summary(self, elapsed):
+        rows = {}
+        for route, values in sorted(self.latencies.items()):
+            values.sort()
+            statuses = self.statuses[route]
+            rows[route] = {
+                'requests': len(values),
+                'rps': len(values) / elapsed,
+                '4xx': sum(n for s, n in statuses.items() if 400 <= s < 500),
+                '5xx': sum(n for s, n in statuses.items() if s >= 500 or s == 0),
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'max_ms': values[-1] * 1000,
+            }
+        return rows
+
+
+class VirtualUser:
+    def __init__(self, url, stats, pool, image, rng):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        self.stats, self.pool, self.image, self.rng = stats, pool, image, rng
+        self.token = None
+
+    def call(self, route, method, path, body=None, content_type='application/json', auth=False):
+        headers = {}
+        if body is not None:
+            if content_type == 'application/json':
+                body = json.dumps(body)
+            headers['Content-Type'] = content_type
+        if auth and self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            data, status = b'', 0
+        self.stats.record(route, status, time.perf_counter() - started)
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    def login(self):
+        self.call('POST /request-otp', 'POST', '/request-otp', {'phone_number': TEST_PHONE, 'source': 'login'})
+        status, data = self.call('POST /login', 'POST', '/login', {'phone_number': TEST_PHONE, 'otp': TEST_OTP})
+        if status == 200:
+            self.token = data['token']
+
+    def browse(self):
+        params = {}
+        if self.rng.random() < 0.5:
+            params['city'] = self.rng.choice(CITIES)
+        if self.rng.random() < 0.2:
+            params['count'] = self.rng.randint(1, 3)
+        sort = self.rng.choice(SORTS)
+        if sort:
+            params['sort'] = sort
+        if self.rng.random() < 0.7:
+            params['view'] = 'card'
+        self.call('GET /tickets', 'GET', '/tickets' + ('?' + urlencode(params) if params else ''))
+
+    def filters(self):
+        self.call('GET /active-filters', 'GET', '/active-filters')
+
+    def checkout(self):
+        ticket_id = self.pool.pick(self.rng)
+        if not ticket_id:
+            return
+        self.call('GET /ticket/<id>', 'GET', f'/ticket/{ticket_id}', auth=True)
+        status, order = self.call('POST /create-order/<id>', 'POST', f'/create-order/{ticket_id}', auth=True)
+        # Only some checkouts complete, and each ticket can only be bought once
+        if status != 200 or self.rng.random() > 0.3:
+            return
+        ticket_id = self.pool.take(ticket_id)
+        if not ticket_id:
+            return
+        payment_id = 'pay_' + uuid.uuid4().hex[:14]
+        signature = hmac.new(RAZORPAY_TEST_SECRET.encode(), f"{order['order_id']}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+        self.call('POST /verify-payment', 'POST', '/verify-payment', {
+            'razorpay_order_id': order['order_id'],
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': signature,
+            'ticket_id': ticket_id
+        }, auth=True)
+
+    def upload(self):
+        body, content_type = multipart(
+            {'selling_price': self.rng.randint(150, 400)},
+            {'image': ('ticket.jpg', self.image, 'image/jpeg')}
+        )
+        self.call('POST /upload2', 'POST', '/upload2', body, content_type, auth=True)
+
+    def run(self, mix, deadline):
+        self.login()
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            getattr(self, self.rng.choices(names, weights)[0])()
+        self.conn.close()
+
+
+class TicketPool:
+    # Unsold ticket ids to check out; a bought id is removed so it is not bought twice
+    def __init__(self, ids):
+        self.lock = threading.Lock()
+        self.ids = list(ids)
+        self.live = set(self.ids)
+
+    def pick(self, rng):
+        with self.lock:
+            return rng.choice(self.ids) if self.ids else None
+
+    def take(self, ticket_id):
+        with self.lock:
+            if ticket_id not in self.live:
+                return None
+            self.live.discard(ticket_id)
+            self.ids.remove(ticket_id)
+            return ticket_id
+
+
+def load_ticket_ids(url, limit=5000):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+    conn.request('GET', '/tickets?fields=count')
+    data = json.loads(conn.getresponse().read() or b'[]')
+    conn.close()
+    return [t['_id'] for t in data[:limit]]
+
+
+def run(url, mix, users, duration, seed_value):
+    stats = Stats()
+    pool = TicketPool(load_ticket_ids(url))
+    image = make_image()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=VirtualUser(url, stats, pool, image, random.Random(seed_value + i)).run, args=(mix, deadline))
+        for i in range(users)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return stats.summary(time.perf_counter() - started)
+
+
+def print_report(rows):
+    print(f"{'route':<26}{'requests':>9}{'req/s':>9}{'4xx':>6}{'5xx':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for route, r in rows.items():
+        print(f"{route:<26}{r['requests']:>9}{r['rps']:>9.1f}{r['4xx']:>6}{r['5xx']:>6}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--start', choices=sorted(MODES), help='start gunicorn in this mode with fake gateways')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--users', type=int, default=32, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--fail-on-errors', action='store_true', help='exit 1 if any request got a 5xx (for CI)')
+    parser.add_argument('--allow-remote', action='store_true', help='run even if MONGO_URI is not a local MongoDB')
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+    # Logins, orders and uploads are real writes, like seed.py's
+    require_local_mongo(args.allow_remote, 'send benchmark traffic against')
+
+    server, url = None, args.url
+    if args.start:
+        # Every virtual user shares one IP and the test login, so limits would only measure 429s
+        server, url = start_server(args.start, args.port, {
+            'FAKE_GATEWAYS': '1',
+            'RATE_LIMIT_ENABLED': '0',
+            'RAZORPAY_KEY_ID': RAZORPAY_TEST_KEY_ID,
+            'RAZORPAY_KEY_SECRET': RAZORPAY_TEST_SECRET
+        })
+    try:
+        rows = run(url, mix, args.users, args.duration, args.seed)
+    finally:
+        if server:
+            stop_server(server)
+
+    print_report(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'mode': args.start, 'users': args.users, 'duration': args.duration, 'mix': mix, 'routes': rows}, f, indent=2)
+    if args.fail_on_errors and any(r['5xx'] for r in rows.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# Gunicorn settings, read with `gunicorn -c gunicorn.conf.py app:app`.
+#
+# Most of a request's time is spent waiting on MongoDB, Razorpay or Gemini, so a
+# worker should be able to hold several requests at once. Pick the model with
+# GUNICORN_WORKER_CLASS:
+#
+#   gthread (default)  WEB_CONCURRENCY processes x GUNICORN_THREADS threads
+#   gevent             WEB_CONCURRENCY processes x GUNICORN_WORKER_CONNECTIONS
+#                      greenlets (standard library monkey-patched by gunicorn)
+#   sync               the old one-request-per-process setup, for comparison
+#
+# Every blueprint is safe under both threads and greenlets: module state is
+# limited to collection handles, the lazily built clients in utils/db.py and
+# utils/clients.py (created under a lock), and the catalogue snapshot, which is
+# swapped atomically.
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.getenv("GUNICORN_THREADS", 8)) if worker_class == "gthread" else 1
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 200))
+
+# Gemini calls on upload2 can take a while; keep a worker from being killed mid-request
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so a slow leak cannot grow forever
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+# The app writes its own sampled JSON access log (utils/logging_setup.py)
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+# Shared directory for prometheus_client's multi-process mode (utils/metrics.py)
+metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+def on_starting(server):
+    # Memory rate limits are per worker, so each worker would allow the full limit
+    if (workers > 1 and os.getenv("RATE_LIMIT_BACKEND", "memory") == "memory"
+            and os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ('0', 'false', 'no')):
+        server.log.warning("RATE_LIMIT_BACKEND=memory with %d workers allows %dx every limit; "
+                           "use mongo or redis (see utils/rate_limit.py)", workers, workers)
+
+    # Samples left over from a previous run would be added to this one
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            if name.endswith('.db'):
+                os.remove(os.path.join(metrics_dir, name))
+
+
+def child_exit(server, worker):
+    # Drops the dead worker's live gauges (pool connections) from /metrics
+    if metrics_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # The Gemini SDK talks gRPC, whose C core blocks the whole process unless it
+    # is told to cooperate with gevent
+    if worker_class == "gevent":
+        try:
+            from grpc.experimental import gevent as grpc_gevent
+            grpc_gevent.init_gevent()
+        except ImportError:
+            pass
@@ -1,12 +1,19 @@
-from flask import Blueprint, request, jsonify
-from pymongo import MongoClient
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
-from bson import ObjectId
-import os
 from utils.auth_utils import token_required, admin_required
+from utils.analytics import GROUP_FIELDS, refresh_if_stale, refresh_rollups, read_stats
+from routes.my_tickets import add_to_active_filters, remove_from_active_filters
 
 from datetime import datetime
+import csv
+import io
 import uuid
+from utils.db import db
+from utils.response_cache import invalidate_listings
+from utils.ticket_cache import invalidate_tickets
+from utils.archive import archive_collection
 
 # Load environment variables
 load_dotenv()
@@ -14,29 +21,125 @@ load_dotenv()
 admin_tickets = Blueprint('admin_tickets', __name__)
 
 # MongoDB setup
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
 ticket_collection = db["tickets"]
 users = db["users"]
+report_collection = db["reports"]
 
-# Helper: Check admin role
-def is_admin(user_id):
-    user = users.find_one({'_id': ObjectId(user_id)})
-    return user and user.get('role') == 'admin'
+# Paging and export settings for /admin/tickets
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EXPORT_BATCH_SIZE = 500
+EXPORT_CSV_FIELDS = [
+    'ticket_id', 'event_name', 'venue', 'city', 'datetime', 'original_price',
+    'selling_price', 'count', 'seat_numbers', 'user_id', 'sold_by', 'bought_by',
+    'is_sold', 'deleted', 'created_at', 'sold_at', 'contact_info', 'ticket_url'
+]
 
-# View all tickets
+# Bulk moderation settings
+BULK_ACTIONS = {'delete': 'deleted', 'hide': 'hidden', 'restore': 'restored'}
+MAX_BULK_ITEMS = 1000
+
+# Helper: Every ticket, live ones first and then the archive (utils/archive.py)
+def all_tickets():
+    for collection in (ticket_collection, archive_collection):
+        yield from collection.find({}).sort('_id', 1).batch_size(EXPORT_BATCH_SIZE)
+
+
+# Helper: One page over live tickets followed by archived ones (they carry archived_at),
+# with one extra document to know whether another page exists
+def page_of_tickets(offset, size):
+    tickets = list(ticket_collection.find({}).sort('_id', 1).skip(offset).limit(size + 1))
+    if len(tickets) > size:
+        return tickets
+    # Past the live tickets: skip whatever part of the offset the archive still owes
+    archive_offset = 0 if tickets else max(offset - ticket_collection.count_documents({}), 0)
+    return tickets + list(
+        archive_collection.find({}).sort('_id', 1).skip(archive_offset).limit(size + 1 - len(tickets))
+    )
+
+
+# Helper: Stream the whole collection one row at a time, never holding it in memory
+def export_rows(fmt):
+    cursor = all_tickets()
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        yield buffer.getvalue()
+        for ticket in cursor:
+            buffer.seek(0)
+            buffer.truncate()
+            ticket['ticket_id'] = ticket.pop('_id')
+            if isinstance(ticket.get('seat_numbers'), list):
+                ticket['seat_numbers'] = ' '.join(str(seat) for seat in ticket['seat_numbers'])
+            writer.writerow(ticket)
+            yield buffer.getvalue()
+    else:
+        for ticket in cursor:
+            ticket['ticket_id'] = ticket.pop('_id')
+            yield current_app.json.dumps(ticket) + '\n'
+
+
+# View all tickets (paginated), or export them with ?format=ndjson|csv
 @admin_tickets.route('/admin/tickets', methods=['GET'])
 @token_required
 @admin_required
 def view_all_tickets():
-    tickets = list(ticket_collection.find({}))
+    fmt = request.args.get('format')
+    if fmt in ('ndjson', 'csv'):
+        mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/csv'
+        response = Response(stream_with_context(export_rows(fmt)), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename=tickets.{fmt}'
+        return response
+    if fmt:
+        return jsonify({'error': 'Invalid format'}), 400
+
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid page or limit'}), 400
+
+    cursor = page_of_tickets((page - 1) * limit, limit)
 
     formatted = []
-    for ticket in tickets:
+    for ticket in cursor:
         ticket['ticket_id'] = ticket.pop('_id')  # rename _id to ticket_id
+        if 'archived_at' in ticket:
+            ticket['read_only'] = True  # bulk moderation only acts on live tickets
         formatted.append(ticket)
 
-    return jsonify(formatted), 200
+    has_more = len(formatted) > limit
+    return jsonify({
+        'tickets': formatted[:limit],
+        'page': page,
+        'limit': limit,
+        'has_more': has_more
+    }), 200
+
+
+# Sales volume, GMV, sell-through and time-to-sell per movie, city or day
+@admin_tickets.route('/admin/stats', methods=['GET'])
+@token_required
+@admin_required
+def sales_stats():
+    group_by = request.args.get('group_by', 'movie')
+    if group_by not in GROUP_FIELDS:
+        return jsonify({'error': 'group_by must be one of movie, city, day'}), 400
+
+    refresh_if_stale()
+    stats = read_stats(group_by, request.args.get('from'), request.args.get('to'))
+    return jsonify({'group_by': group_by, 'stats': stats}), 200
+
+
+# Force an incremental refresh of the stats rollups
+@admin_tickets.route('/admin/stats/refresh', methods=['POST'])
+@token_required
+@admin_required
+def refresh_stats():
+    refresh_rollups()
+    return jsonify({'message': 'Stats refreshed'}), 200
 
 
 # Post a new ticket as admin
@@ -64,16 +167,134 @@ def admin_post_ticket():
     }
 
     ticket_collection.insert_one(ticket)
+    invalidate_listings()
     return jsonify({'message': 'Ticket posted by admin', 'ticket_id': ticket['_id']}), 201
 
-# Delete any ticket by ID
+# Permanently delete any ticket by ID, live or archived (bulk delete below is a soft delete)
 @admin_tickets.route('/admin/tickets/<ticket_id>', methods=['DELETE'])
 @token_required
+@admin_required
 def admin_delete_ticket(ticket_id):
-    if not is_admin(request.user_id):
-        return jsonify({'error': 'Unauthorized'}), 403
-
     result = ticket_collection.delete_one({'_id': ticket_id})
+    if result.deleted_count == 0:
+        result = archive_collection.delete_one({'_id': ticket_id})
     if result.deleted_count == 0:
         return jsonify({'error': 'Ticket not found'}), 404
+    invalidate_listings()
+    invalidate_tickets(ticket_id)
     return jsonify({'message': 'Ticket deleted by admin'}), 200
+
+
+# Helper: Tickets reported at least min_reports times (counter docs, or legacy one-per-click docs)
+def reported_ticket_ids(min_reports, limit):
+    pipeline = [
+        {'$group': {'_id': '$ticket_id', 'reports': {'$sum': {'$ifNull': ['$count', 1]}}}},
+        {'$match': {'reports': {'$gte': min_reports}}},
+        {'$limit': limit}
+    ]
+    return [doc['_id'] for doc in report_collection.aggregate(pipeline)]
+
+
+# Helper: One write operation per ticket for a bulk action. Delete is a soft delete,
+# like the owner's own delete; restore undoes hides and admin deletes (not owner deletes).
+def bulk_operation(action, ticket):
+    now = datetime.utcnow().isoformat()
+    if action == 'delete':
+        # Never on an owner-deleted ticket, or restore would bring it back
+        return UpdateOne(
+            {'_id': ticket['_id'], 'deleted': {'$ne': True}},
+            {'$set': {'deleted': True, 'deleted_at': now, 'deleted_by_admin': request.user_id}}
+        )
+    if action == 'hide':
+        return UpdateOne(
+            {'_id': ticket['_id']},
+            {'$set': {'hidden': True, 'hidden_at': now, 'hidden_by': request.user_id}}
+        )
+    update = {'$set': {'hidden': False}, '$unset': {'hidden_at': '', 'hidden_by': ''}}
+    if ticket.get('deleted_by_admin'):
+        update['$set']['deleted'] = False
+        update['$unset'].update({'deleted_at': '', 'deleted_by_admin': ''})
+    return UpdateOne({'_id': ticket['_id']}, update)
+
+
+# Delete, hide or restore many tickets at once, by ID list or by report count.
+# Body: {"action": "hide", "ids": [...]} or {"action": "delete", "filter": {"min_reports": 5}}
+@admin_tickets.route('/admin/tickets/bulk', methods=['POST'])
+@token_required
+@admin_required
+def admin_bulk_moderate():
+    data = request.get_json() or {}
+    action = data.get('action')
+    if action not in BULK_ACTIONS:
+        return jsonify({'error': 'action must be one of delete, hide, restore'}), 400
+
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+            return jsonify({'error': 'ids must be a list of ticket IDs'}), 400
+        ids = list(dict.fromkeys(ids))  # drop duplicates, keep order
+    elif isinstance(data.get('filter'), dict) and 'min_reports' in data['filter']:
+        try:
+            min_reports = int(data['filter']['min_reports'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'min_reports must be a number'}), 400
+        ids = reported_ticket_ids(max(min_reports, 1), MAX_BULK_ITEMS)
+    else:
+        return jsonify({'error': 'Provide ids or filter.min_reports'}), 400
+
+    if len(ids) > MAX_BULK_ITEMS:
+        return jsonify({'error': f'At most {MAX_BULK_ITEMS} tickets per request'}), 400
+
+    # One read to learn which IDs exist (and their filter keys), one bulk write for all of them
+    found = {
+        t['_id']: t for t in ticket_collection.find(
+            {'_id': {'$in': ids}}, {'event_name': 1, 'city': 1, 'is_sold': 1, 'deleted': 1, 'deleted_by_admin': 1}
+        )
+    }
+    # Already deleted (by the owner or an earlier bulk delete): nothing to do
+    already_deleted = {t for t in found if action == 'delete' and found[t].get('deleted')}
+    targets = [ticket_id for ticket_id in ids if ticket_id in found and ticket_id not in already_deleted]
+    failed = set()
+    # Archived tickets (old sold or deleted ones, utils/archive.py) are read-only
+    missing = [ticket_id for ticket_id in ids if ticket_id not in found]
+    archived = set(archive_collection.distinct('_id', {'_id': {'$in': missing}})) if missing else set()
+
+    if targets:
+        try:
+            ticket_collection.bulk_write([bulk_operation(action, found[t]) for t in targets], ordered=False)
+        except BulkWriteError as e:
+            failed = {targets[err['index']] for err in e.details.get('writeErrors', [])}
+
+    done = [t for t in targets if t not in failed]
+    if done:
+        invalidate_listings()
+        invalidate_tickets(*done)
+    if done and action in ('delete', 'restore'):
+        report_collection.delete_many({'ticket_id': {'$in': done}})
+
+    # Keep the home page filters in step, once per (movie, city) pair
+    if action == 'restore':
+        pairs = {(found[t].get('event_name'), found[t].get('city')) for t in done
+                 if not found[t].get('is_sold') and (not found[t].get('deleted') or found[t].get('deleted_by_admin'))}
+        for movie, city in pairs:
+            add_to_active_filters(movie, city)
+    else:
+        pairs = {(found[t].get('event_name'), found[t].get('city')) for t in done}
+        for movie, city in pairs:
+            remove_from_active_filters(movie, city)
+
+    results = []
+    for ticket_id in ids:
+        if ticket_id in archived:
+            status = 'archived'
+        elif ticket_id not in found:
+            status = 'not_found'
+        elif ticket_id in already_deleted:
+            status = 'already_deleted'
+        elif ticket_id in failed:
+            status = 'error'
+        else:
+            status = BULK_ACTIONS[action]
+        results.append({'ticket_id': ticket_id, 'status': status})
+
+    return jsonify({'action': action, 'processed': len(done), 'results': results}), 200
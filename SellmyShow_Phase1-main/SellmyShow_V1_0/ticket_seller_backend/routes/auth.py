@@ -1,27 +1,23 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from pymongo import MongoClient
 from dotenv import load_dotenv
 from datetime import datetime, timezone, timedelta
 import jwt as pyjwt
-import os
 import bcrypt
+from utils.auth_utils import JWT_SECRET
+from utils.db import db
+from utils.rate_limit import rate_limit, json_field
 
 load_dotenv()
 auth = Blueprint('auth', __name__)
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
 users = db["users"]
 otp_requests = db["otp_requests"]
 
-JWT_SECRET = os.getenv("JWT_SECRET")
-
-JWT_SECRET = "N8^!@3gf9sdfgdsadskfjnkjn"
 
 
 # Signup route
 
 @auth.route('/signup', methods=['POST'])
+@rate_limit('signup', '10/hour')
 def signup():
     data = request.get_json()
     name = data.get('name')
@@ -67,6 +63,8 @@ def signup():
 
 #Login route
 @auth.route('/login', methods=['POST'])
+@rate_limit('login_ip', '30/hour')
+@rate_limit('login_phone', '10/900', by=json_field('phone_number'))
 def login():
     data = request.get_json()
     phone = data.get('phone_number')
@@ -1,32 +1,27 @@
-import os
 import uuid
+import logging
 import hmac
 import hashlib
 from flask import Blueprint, request, jsonify
-from pymongo import MongoClient
-import razorpay
 from datetime import datetime
 from utils.auth_utils import token_required
+from utils.clients import get_razorpay_client, razorpay_keys
+from utils.metrics import external_call
+from utils.db import db
+from utils.response_cache import invalidate_listings
+from utils.ticket_cache import ticket_cache, invalidate_tickets
 
 checkout_bp = Blueprint('checkout', __name__)
-
-# Load env vars
-RAZORPAY_KEY = os.getenv("RAZORPAY_KEY_ID")
-RAZORPAY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
-MONGO_URI = os.getenv("MONGO_URI")
-
-print("Key:", os.getenv("RAZORPAY_KEY_ID"))
-print("Secret:", os.getenv("RAZORPAY_KEY_SECRET"))
-
+logger = logging.getLogger(__name__)
 
 # Mongo client
-client = MongoClient(MONGO_URI)
-db = client["ticket_db"]
 ticket_collection = db["tickets"]
 active_filters_collection = db["active_filters"]
 
-# Razorpay client
-razorpay_client = razorpay.Client(auth=("rzp_test_WBqA0ZuXePL0o0", "aCv97pbnWL1zUXVCySeRX6R5"))
+# Razorpay client is created on first use, see utils/clients.py
+
+# Moderated (hidden) and deleted tickets cannot be opened or bought
+VISIBLE = {'deleted': False, 'hidden': {'$ne': True}}
 
 
 
@@ -36,7 +31,8 @@ def remove_from_active_filters(movie, city):
         'event_name': movie,
         'venue': city,
         'is_sold': False,
-        'deleted': False
+        'deleted': False,
+        'hidden': {'$ne': True}
     })
     if remaining == 0:
         active_filters_collection.update_one(
@@ -54,35 +50,47 @@ def remove_from_active_filters(movie, city):
 @checkout_bp.route('/ticket/<ticket_id>', methods=['GET'])
 @token_required
 def get_ticket(ticket_id):
-    ticket = ticket_collection.find_one({'_id': ticket_id}, {'contact_info': 0, 'ticket_url': 0})
-    if not ticket:
-        return jsonify({'error': 'Ticket not found'}), 404
+    # Detail pages are read far more often than tickets change, see utils/ticket_cache.py
+    ticket = ticket_cache.get(ticket_id)
+    if ticket is None:
+        ticket = ticket_collection.find_one(
+            {'_id': ticket_id, **VISIBLE}, {'contact_info': 0, 'ticket_url': 0, 'ticket_images': 0}
+        )
+        if not ticket:
+            return jsonify({'error': 'Ticket not found'}), 404
+        ticket['ticket_id'] = ticket.pop('_id')
+        ticket_cache.set(ticket_id, ticket)
 
-    ticket['ticket_id'] = ticket.pop('_id')
     return jsonify(ticket), 200
 
 
 @checkout_bp.route('/create-order/<ticket_id>', methods=['POST'])
 @token_required
 def create_order(ticket_id):
-    ticket = ticket_collection.find_one({'_id': ticket_id})
-    count = ticket['count']
+    ticket = ticket_collection.find_one({'_id': ticket_id, 'is_sold': False, **VISIBLE})
     if not ticket:
         return jsonify({'error': 'Ticket not found'}), 404
+    count = ticket['count']
+
+    try:
+        key_id, _ = razorpay_keys()
+    except RuntimeError:
+        logger.exception("Payments are not configured")
+        return jsonify({'error': 'Payments are not configured'}), 503
 
     amount = int(ticket['selling_price']) * 100 * count  # INR to paise
-    print("Ticket:", ticket)
-    print("Amount:", amount)
+    logger.info("Creating order", extra={'ticket_id': ticket_id, 'amount': amount, 'count': count})
 
     try:
-        order = razorpay_client.order.create({
-            "amount": amount,
-            "currency": "INR",
-            "payment_capture": 1,
-            "receipt": str(uuid.uuid4())
-        })
+        with external_call('razorpay'):
+            order = get_razorpay_client().order.create({
+                "amount": amount,
+                "currency": "INR",
+                "payment_capture": 1,
+                "receipt": str(uuid.uuid4())
+            })
     except Exception as e:
-        print("Razorpay Error:", e)
+        logger.exception("Razorpay order creation failed", extra={'ticket_id': ticket_id})
         return jsonify({'error': str(e)}), 500
     
 
@@ -90,7 +98,7 @@ def create_order(ticket_id):
         'order_id': order['id'],
         'amount': amount,
         'currency': 'INR',
-        'key': RAZORPAY_KEY
+        'key': key_id
     }), 200
 
 
@@ -106,25 +114,32 @@ def verify_payment():
     if not all([order_id, payment_id, signature, ticket_id]):
         return jsonify({'error': 'Missing fields'}), 400
 
+    try:
+        _, secret = razorpay_keys()
+    except RuntimeError:
+        logger.exception("Payments are not configured")
+        return jsonify({'error': 'Payments are not configured'}), 503
+
     generated_signature = hmac.new(
-        bytes("aCv97pbnWL1zUXVCySeRX6R5", 'utf-8'),
+        bytes(secret, 'utf-8'),
         bytes(order_id + "|" + payment_id, 'utf-8'),
         hashlib.sha256
     ).hexdigest()
 
-    if generated_signature != signature:
+    if not hmac.compare_digest(generated_signature, signature):
         return jsonify({"error": "Signature verification failed"}), 400
 
-    ticket = ticket_collection.find_one({'_id': ticket_id})
-    movie = ticket.get('event_name')
-    city = ticket.get('city')
+    ticket = ticket_collection.find_one({'_id': ticket_id, **VISIBLE})
     if not ticket:
         return jsonify({'error': 'Ticket not found'}), 404
     if ticket.get('is_sold'):
         return jsonify({'error': 'Ticket already sold'}), 403
+    movie = ticket.get('event_name')
+    city = ticket.get('city')
 
-    ticket_collection.update_one(
-        {'_id': ticket_id},
+    # Conditional, so a ticket hidden, deleted or sold since the read is not sold again
+    result = ticket_collection.update_one(
+        {'_id': ticket_id, 'is_sold': False, **VISIBLE},
         {
             '$set': {
                 'bought_by': request.user_id,
@@ -134,10 +149,13 @@ def verify_payment():
                 'razorpay_payment_id': payment_id
             }
         }
-
     )
+    if result.matched_count == 0:
+        return jsonify({'error': 'Ticket is no longer available'}), 409
 
     remove_from_active_filters(movie, city)
+    invalidate_listings()
+    invalidate_tickets(ticket_id)
 
 
     return jsonify({'message': 'Payment verified and ticket marked as sold'}), 200
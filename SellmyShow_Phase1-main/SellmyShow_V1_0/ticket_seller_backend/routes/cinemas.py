@@ -1,14 +1,13 @@
 from flask import Blueprint, jsonify
-from pymongo import MongoClient
-import os
 from dotenv import load_dotenv
+from utils.db import db
+from utils.rate_limit import rate_limit
 load_dotenv()
 cinema = Blueprint('cinema', __name__)
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
 cinema_collection = db["cinema_data"]
 
 @cinema.route('/cinema-data', methods=['GET'])
+@rate_limit('cinema_data', '60/minute')
 def get_cinema_data():
     data = list(cinema_collection.find({}, {'_id': 0}))  # Remove _id
     return jsonify(data), 200
@@ -1,10 +1,9 @@
 from flask import Blueprint, request, jsonify
-from pymongo import MongoClient
 from datetime import datetime
 from dotenv import load_dotenv
 from bson import ObjectId
-import os
 from utils.auth_utils import token_required
+from utils.db import db
 
 # Load environment variables
 load_dotenv()
@@ -12,8 +11,6 @@ load_dotenv()
 profile = Blueprint('profile', __name__)
 
 # MongoDB setup
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
 users = db["users"]
 
 # PUT: Edit profile
@@ -45,6 +42,14 @@ def edit_profile():
 
     return jsonify({'message': 'Profile updated successfully'}), 200
 
+# Helper: The fields the profile page shows (also sent by /home)
+def profile_fields(user):
+    return {
+        'name': user.get('name', ''),
+        'email': user.get('email'),
+        'upiId': user.get('upiId', '')
+    }
+
 # GET: Get profile details
 @profile.route('/profile', methods=['GET'])
 @token_required
@@ -57,10 +62,4 @@ def get_profile():
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    profile_data = {
-        'name': user.get('name', ''),
-        'email': user.get('email'),
-        'upiId': user.get('upiId', '')
-    }
-
-    return jsonify(profile_data), 200
+    return jsonify(profile_fields(user)), 200
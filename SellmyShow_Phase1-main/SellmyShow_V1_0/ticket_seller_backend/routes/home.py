@@ -0,0 +1,141 @@
+from flask import Blueprint, request, jsonify, Response, copy_current_request_context
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from bson import ObjectId
+import hashlib
+import logging
+import os
+from utils.auth_utils import get_optional_user_id
+from utils.response_utils import body_response, compact_dumps
+from utils.rate_limit import rate_limit
+from utils.metrics import add_request_db_stats, request_db_stats, reset_request_db_stats
+from routes.tickets import parse_listing_args, listings_body
+from routes.filter import active_filters_collection
+from routes.cinemas import cinema_collection
+from routes.edit_profile import users, profile_fields
+
+# Load .env variables
+load_dotenv()
+
+# GET /home: everything the home page needs in one round trip.
+#
+# The listings (card view), active filters, cinema data and, for a signed-in
+# caller, the profile are read concurrently and sent as one compressed body:
+#
+#   {"tickets": {"etag": "...", "data": [...]}, "filters": {...}, "cinemas": {...}, "profile": {...}}
+#
+# A client that kept the etags from its last visit sends them back as
+# ?known=tickets:<etag>,cinemas:<etag> and sections that have not changed come
+# back as {"etag": "...", "unchanged": true} without their data. The response
+# also carries an ETag over all sections, so If-None-Match gets a 304. A section
+# that fails is sent as {"error": ...}; the client then falls back to its own
+# endpoint (/tickets, /active-filters, /cinema-data, /profile).
+
+logger = logging.getLogger(__name__)
+
+home = Blueprint('home', __name__)
+
+HOME_WORKERS = int(os.getenv("HOME_WORKERS", 4))
+SECTION_TIMEOUT = float(os.getenv("HOME_SECTION_TIMEOUT", 10))
+
+executor = ThreadPoolExecutor(max_workers=HOME_WORKERS, thread_name_prefix='home')
+
+
+# Helper: Validator of one serialised section
+def section_tag(body):
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+# Helper: ?known=tickets:<etag>,filters:<etag> -> {'tickets': '<etag>', ...}
+def known_tags(text):
+    known = {}
+    for part in (text or '').split(','):
+        name, _, tag = part.partition(':')
+        if name.strip() and tag.strip():
+            known[name.strip()] = tag.strip()
+    return known
+
+
+def tickets_section(params):
+    body, _, _ = listings_body(*params)
+    return body
+
+
+def filters_section():
+    filters = active_filters_collection.find_one({}, {'_id': 0}) or {'movies': [], 'cities': []}
+    return compact_dumps(filters).encode('utf-8')
+
+
+def cinemas_section():
+    return compact_dumps(list(cinema_collection.find({}, {'_id': 0}))).encode('utf-8')
+
+
+def profile_section(user_id):
+    user = users.find_one({'_id': ObjectId(user_id)}, {'name': 1, 'email': 1, 'upiId': 1})
+    return compact_dumps(profile_fields(user) if user else None).encode('utf-8')
+
+
+# Helper: Runs on a pool thread; returns the section body and the DB time it took
+def run_section(build, *args):
+    reset_request_db_stats()
+    body = build(*args)
+    return body, request_db_stats()
+
+
+@home.route('/home', methods=['GET'])
+@rate_limit('home', '120/minute')
+def get_home():
+    # Listing filters are the same as /tickets, but the home page shows cards
+    args = request.args.copy()
+    args.setdefault('view', 'card')
+    params, error = parse_listing_args(args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    # 1. Start every read at once
+    builders = {
+        'tickets': (tickets_section, params),
+        'filters': (filters_section,),
+        'cinemas': (cinemas_section,),
+    }
+    user_id = get_optional_user_id()
+    if user_id:
+        builders['profile'] = (profile_section, user_id)
+
+    futures = {
+        name: executor.submit(copy_current_request_context(run_section), *builder)
+        for name, builder in builders.items()
+    }
+
+    # 2. Collect them in a fixed order
+    known = known_tags(request.args.get('known'))
+    parts, tags = [], []
+    for name, future in futures.items():
+        try:
+            body, (seconds, commands) = future.result(timeout=SECTION_TIMEOUT)
+            add_request_db_stats(seconds, commands)
+        except Exception:
+            logger.exception("Building the %s section of /home failed", name)
+            parts.append(b'"%s":{"error":"Unavailable"}' % name.encode())
+            tags = None
+            continue
+
+        tag = section_tag(body)
+        if tags is not None:
+            tags.append(f'{name}:{tag}')
+        if known.get(name) == tag:
+            parts.append(b'"%s":{"etag":"%s","unchanged":true}' % (name.encode(), tag.encode()))
+        else:
+            parts.append(b'"%s":{"etag":"%s","data":%s}' % (name.encode(), tag.encode(), body))
+
+    # 3. Whole-response validator (skipped when a section failed, so the client retries)
+    etag = section_tag(','.join(tags).encode()) if tags is not None else None
+    if etag and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = body_response(b'{' + b','.join(parts) + b'}')
+    if etag:
+        response.set_etag(etag, weak=True)
+    response.vary.update(('Accept-Encoding', 'Authorization'))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
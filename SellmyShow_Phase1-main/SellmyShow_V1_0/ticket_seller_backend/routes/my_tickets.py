@@ -1,11 +1,16 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.utils import secure_filename
+from pymongo import ASCENDING
 from datetime import datetime
-from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
 import uuid
 from utils.auth_utils import token_required
+from utils.storage import get_storage, file_extension
+from utils.images import schedule_derivatives, derivative_urls, key_from_url
+from utils.catalogue import catalogue
+from utils.db import db
+from utils.response_cache import invalidate_listings
+from utils.ticket_cache import invalidate_tickets
+from utils.archive import archive_collection
 
 # Load .env variables
 load_dotenv()
@@ -13,15 +18,18 @@ load_dotenv()
 my_tickets = Blueprint('my_tickets', __name__)
 
 # MongoDB connection
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
 ticket_collection = db["tickets"]
 active_filters_collection = db["active_filters"]
 
-
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
 
+# Paging for /me/dashboard (each section pages on its own)
+DASHBOARD_SECTIONS = ('selling', 'sold', 'bought')
+DASHBOARD_PAGE_SIZE = 20
+DASHBOARD_MAX_PAGE_SIZE = 100
+
+_indexes_ready = False
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -42,7 +50,8 @@ def remove_from_active_filters(movie, city):
         'event_name': movie,
         'city': city,
         'is_sold': False,
-        'deleted': False
+        'deleted': False,
+        'hidden': {'$ne': True}
     })
     if remaining == 0:
         active_filters_collection.update_one(
@@ -65,10 +74,10 @@ def upload_ticket_file():
 
     file = request.files['file']
     if file and allowed_file(file.filename):
-        filename = secure_filename(f"{uuid.uuid4().hex}_{file.filename}")
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        return jsonify({'file_url': f"/uploads/{filename}"}), 200
+        storage = get_storage()
+        key = storage.save(file.stream, file_extension(file.filename))
+        schedule_derivatives(key)
+        return jsonify({'file_url': storage.url(key), 'images': derivative_urls(key)}), 200
     return jsonify({'error': 'Invalid file type'}), 400
 
 
@@ -88,6 +97,10 @@ def post_ticket():
     if not isinstance(data['seat_numbers'], list) or len(data['seat_numbers']) != int(data['count']):
         return jsonify({'error': 'Seat numbers must match the ticket count'}), 400
 
+    # Listing cards and the buy page show the movie poster (with its resized copies)
+    movie = catalogue.lookup(data['event_name']) or {}
+    image_key = key_from_url(data['ticket_url'])
+
     ticket = {
         '_id': str(uuid.uuid4()),
         'user_id': request.user_id,
@@ -102,6 +115,9 @@ def post_ticket():
         'selling_price': data['selling_price'],
         'contact_info': data['contact_info'],
         'ticket_url': data['ticket_url'],
+        'ticket_images': derivative_urls(image_key),
+        'poster_url': movie.get('poster_url'),
+        'poster_images': movie.get('poster_images'),
         'seat_numbers': data['seat_numbers'],
         'count': data['count'],
         'created_at': datetime.utcnow().isoformat(),
@@ -109,7 +125,11 @@ def post_ticket():
     }
 
     ticket_collection.insert_one(ticket)
+    # Derivatives still in progress: run again now the ticket exists, so it gets ticket_images
+    if ticket['ticket_images'] is None and image_key and get_storage().exists(image_key):
+        schedule_derivatives(image_key)
     add_to_active_filters(data['event_name'], data['city'])
+    invalidate_listings()
     return jsonify({'message': 'Ticket posted', 'ticket_id': ticket['_id']}), 201
 
 # GET: Retrieve current user's tickets
@@ -117,7 +137,9 @@ def post_ticket():
 @token_required
 def get_my_tickets():
     user_id = request.user_id
-    tickets = ticket_collection.find({'user_id': user_id, 'deleted': False})
+    query = {'user_id': user_id, 'deleted': False}
+    # Old sold tickets have been moved to the archive (utils/archive.py)
+    tickets = list(ticket_collection.find(query)) + list(archive_collection.find(query))
     result = []
     for t in tickets:
         t['ticket_id'] = t.pop('_id')
@@ -125,6 +147,113 @@ def get_my_tickets():
     return jsonify(result), 200
 
 
+# Helper: Indexes behind the seller and buyer lookups of /me/dashboard
+def ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    ticket_collection.create_index([('user_id', ASCENDING), ('deleted', ASCENDING)])
+    ticket_collection.create_index([('bought_by', ASCENDING)], sparse=True)
+    _indexes_ready = True
+
+
+# Helper: selling_price * count as a number, 0 for anything malformed
+def ticket_value():
+    return {'$multiply': [
+        {'$convert': {'input': '$selling_price', 'to': 'double', 'onError': 0, 'onNull': 0}},
+        {'$convert': {'input': '$count', 'to': 'double', 'onError': 1, 'onNull': 1}}
+    ]}
+
+
+# Helper: One page of a section, one extra document to know whether another page exists
+def page_stages(match, sort_field, page, limit):
+    return [
+        {'$match': match},
+        {'$sort': {sort_field: -1, '_id': 1}},
+        {'$skip': (page - 1) * limit},
+        {'$limit': limit + 1}
+    ]
+
+
+def dashboard_pipeline(user_id, pages, limit, sections):
+    selling = {'user_id': user_id, 'is_sold': False}
+    sold = {'user_id': user_id, 'is_sold': True}
+    bought = {'bought_by': user_id}
+
+    facets = {}
+    if 'selling' in sections:
+        facets['selling'] = page_stages(selling, 'created_at', pages['selling'], limit)
+    if 'sold' in sections:
+        facets['sold'] = page_stages(sold, 'sold_at', pages['sold'], limit)
+    if 'bought' in sections:
+        facets['bought'] = page_stages(bought, 'sold_at', pages['bought'], limit)
+    if 'summary' in sections:
+        def when(match, value):
+            condition = {'$and': [{'$eq': [f'${k}', v]} for k, v in match.items()]}
+            return {'$sum': {'$cond': [condition, value, 0]}}
+        facets['summary'] = [{'$group': {
+            '_id': None,
+            'selling': when(selling, 1),
+            'sold': when(sold, 1),
+            'bought': when(bought, 1),
+            'listed_value': when(selling, ticket_value()),
+            'earned': when(sold, ticket_value()),
+            'spent': when(bought, ticket_value())
+        }}]
+
+    match = {'$or': [{'user_id': user_id}, {'bought_by': user_id}], 'deleted': False}
+    return [
+        {'$match': match},
+        # Old sold tickets live in the archive (utils/archive.py)
+        {'$unionWith': {'coll': archive_collection.name, 'pipeline': [{'$match': match}]}},
+        {'$facet': facets}
+    ]
+
+
+# GET: Selling, sold and bought tickets plus totals in one aggregation.
+# ?limit=20&selling_page=1&sold_page=1&bought_page=1, and ?sections=sold to load
+# just one section (e.g. its next page)
+@my_tickets.route('/me/dashboard', methods=['GET'])
+@token_required
+def get_dashboard():
+    try:
+        limit = min(max(int(request.args.get('limit', DASHBOARD_PAGE_SIZE)), 1), DASHBOARD_MAX_PAGE_SIZE)
+        pages = {s: max(int(request.args.get(f'{s}_page', 1)), 1) for s in DASHBOARD_SECTIONS}
+    except ValueError:
+        return jsonify({'error': 'Invalid page or limit'}), 400
+
+    sections = DASHBOARD_SECTIONS + ('summary',)
+    if request.args.get('sections'):
+        sections = tuple(s.strip() for s in request.args['sections'].split(',') if s.strip())
+        if not sections or not set(sections) <= set(DASHBOARD_SECTIONS + ('summary',)):
+            return jsonify({'error': 'sections must be selling, sold, bought or summary'}), 400
+
+    ensure_indexes()
+    result = next(ticket_collection.aggregate(dashboard_pipeline(request.user_id, pages, limit, sections)))
+
+    response = {'limit': limit}
+    for section in DASHBOARD_SECTIONS:
+        if section not in result:
+            continue
+        tickets = result[section]
+        for t in tickets:
+            t['ticket_id'] = t.pop('_id')
+        response[section] = {
+            'tickets': tickets[:limit],
+            'page': pages[section],
+            'has_more': len(tickets) > limit
+        }
+    if 'summary' in result:
+        summary = result['summary'][0] if result['summary'] else {}
+        summary.pop('_id', None)
+        response['summary'] = {
+            key: summary.get(key, 0)
+            for key in ('selling', 'sold', 'bought', 'listed_value', 'earned', 'spent')
+        }
+
+    return jsonify(response), 200
+
+
 # PATCH: Update ticket price
 @my_tickets.route('/my-tickets/<ticket_id>/price', methods=['PATCH'])
 @token_required
@@ -149,6 +278,8 @@ def update_ticket_price(ticket_id):
     if result.matched_count == 0:
         return jsonify({'error': 'Ticket not found, already sold, or not authorized'}), 404
 
+    invalidate_listings()
+    invalidate_tickets(ticket_id)
     return jsonify({'message': 'Ticket price updated successfully'}), 200
 
 
@@ -157,7 +288,8 @@ def update_ticket_price(ticket_id):
 @token_required
 def get_bought_tickets():
     user_id = request.user_id
-    tickets = ticket_collection.find({'bought_by': user_id, 'deleted': False})
+    query = {'bought_by': user_id, 'deleted': False}
+    tickets = list(ticket_collection.find(query)) + list(archive_collection.find(query))
 
     result = []
     for t in tickets:
@@ -183,8 +315,10 @@ def delete_my_ticket(ticket_id):
 
     ticket_collection.update_one(
         {'_id': ticket_id},
-        {'$set': {'deleted': True}}
+        {'$set': {'deleted': True, 'deleted_at': datetime.utcnow().isoformat()}}  # ages it for utils/archive.py
     )
     remove_from_active_filters(ticket['event_name'], ticket['city'])
+    invalidate_listings()
+    invalidate_tickets(ticket_id)
     return jsonify({'message': 'Ticket soft-deleted successfully'}), 200
 
@@ -1,19 +1,26 @@
 from flask import Blueprint, request, jsonify
 import random, bcrypt
-from pymongo import MongoClient
 from dotenv import load_dotenv
-from datetime import datetime, timezone, timedelta
-import os
+from datetime import datetime, timedelta
+import logging
+from utils.db import db
+from utils.rate_limit import rate_limit, json_field
 
 load_dotenv()
 
 req_otp = Blueprint('req_otp', __name__)
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
+logger = logging.getLogger(__name__)
 
 otp_requests = db["otp_requests"]
 
+# Helper: No SMS gateway yet, so the OTP only reaches the debug log
+def send_otp(phone, otp):
+    logger.info("OTP sent", extra={'phone': '******' + str(phone)[-4:]})
+    logger.debug("OTP %s for %s", otp, phone)
+
 @req_otp.route('/request-otp', methods=['POST'])
+@rate_limit('otp_ip', '20/hour')
+@rate_limit('otp_phone', '5/900', by=json_field('phone_number'))
 def request_otp():
     data = request.json
     phone = data.get('phone_number')
@@ -34,7 +41,7 @@ def request_otp():
             {'$set': {'otp_hash': otp_hash, 'otp_expiry': expiry}},
             upsert=True
         )
-        print(f"Send OTP {otp} to {phone}")
+        send_otp(phone, otp)
         return jsonify({'message': 'OTP sent'}), 200
 
     elif source == 'login':
@@ -50,7 +57,7 @@ def request_otp():
             {'$set': {'otp_hash': otp_hash, 'otp_expiry': datetime.utcnow() + timedelta(minutes=10)}},
             upsert=False
         )
-            print(f"Send OTP {otp} to {phone}")
+            send_otp(phone, otp)
             return jsonify({'message': 'OTP sent'}), 200
         # Proceed to send OTP for login
         otp = str(random.randint(100000, 999999))
@@ -62,7 +69,7 @@ def request_otp():
             {'$set': {'otp_hash': otp_hash, 'otp_expiry': expiry}},
             upsert=False
         )
-        print(f"Send OTP {otp} to {phone}")
+        send_otp(phone, otp)
         return jsonify({'message': 'OTP sent'}), 200
 
     else:
@@ -1,8 +1,17 @@
 from flask import Blueprint, request, jsonify
-from pymongo import MongoClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 from datetime import datetime
+import hashlib
 import os
+from utils.auth_utils import get_optional_user_id
+from utils.response_utils import body_response, compact_dumps
+from utils.response_cache import listings_cache, invalidate_listings
+from utils.ticket_cache import invalidate_tickets
+from utils.rate_limit import rate_limit
+from routes.my_tickets import remove_from_active_filters
+from utils.db import db
 
 # Load .env variables
 load_dotenv()
@@ -10,50 +19,169 @@ load_dotenv()
 tickets = Blueprint('tickets', __name__)
 
 # MongoDB connection
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
 ticket_collection = db["tickets"]
-report_collection = db["reports"]
+report_collection = db["reports"]  # one counter document per reported ticket
 
-# 1. Get all tickets (public view, only unsold tickets)
-@tickets.route('/tickets', methods=['GET'])
-def get_tickets():
-    query = {'is_sold': False, 'deleted': False}
+# Listings are hidden automatically once this many distinct reporters flag them
+REPORT_HIDE_THRESHOLD = int(os.getenv("REPORT_HIDE_THRESHOLD", 5))
+MAX_REPORTER_FINGERPRINTS = 100
+
+# Fields a listing card on the home page actually renders (_id is always returned)
+CARD_FIELDS = [
+    'event_name', 'venue', 'city', 'datetime', 'selling_price',
+    'original_price', 'count', 'poster_url', 'poster_images'
+]
+
+# Fields a client may ask for via ?fields= (never ticket_url/ticket_images/contact_info)
+PUBLIC_FIELDS = set(CARD_FIELDS) | {
+    'seat_numbers', 'user_id', 'sold_by', 'bought_by', 'is_sold',
+    'created_at', 'deleted', 'hidden'
+}
+
+
+LISTING_SORTS = {'price_asc', 'price_desc', 'date_asc', 'date_desc'}
+
+
+def listing_projection(view, fields):
+    if fields:
+        requested = [f.strip() for f in fields.split(',') if f.strip()]
+        selected = [f for f in requested if f in PUBLIC_FIELDS]
+        if not selected:
+            return None
+        return {f: 1 for f in selected}
+    if view == 'card':
+        return {f: 1 for f in CARD_FIELDS}
+    return {'ticket_url': 0, 'ticket_images': 0, 'contact_info': 0}
 
-    city = request.args.get('city')
+# Helper: Run the listing query (on a cache miss for anonymous requests)
+def load_listings(query, projection, sort):
+    tickets = list(ticket_collection.find(query, projection))
+
+    # Sort logic
+    if sort == 'price_asc':
+        tickets.sort(key=lambda x: x.get('selling_price', 0))
+    elif sort == 'price_desc':
+        tickets.sort(key=lambda x: x.get('selling_price', 0), reverse=True)
+    elif sort == 'date_asc':
+        tickets.sort(key=lambda x: x.get('datetime', ''))
+    elif sort == 'date_desc':
+        tickets.sort(key=lambda x: x.get('datetime', ''), reverse=True)
+    return tickets
+
+
+# Helper: Turn /tickets query args into (query, projection, sort, cache key), or an error message
+def parse_listing_args(args):
+    query = {'is_sold': False, 'deleted': False, 'hidden': {'$ne': True}}
+
+    # Normalised so equivalent URLs share one cache entry
+    city = (args.get('city') or '').strip().lower()
     if city:
         query['city'] = {'$regex': city, '$options': 'i'}  # case-insensitive city match from venue
 
-    count = request.args.get('count')
+    count = args.get('count')
     if count:
         try:
-            query['count'] = {'$gte': int(count)}
+            count = int(count)
         except ValueError:
-            return jsonify({'error': 'Invalid count'}), 400
+            return None, 'Invalid count'
+        query['count'] = {'$gte': count}
 
-    projection = {'ticket_url': 0, 'contact_info': 0}
-    tickets = list(ticket_collection.find(query, projection))
+    projection = listing_projection(args.get('view'), args.get('fields'))
+    if projection is None:
+        return None, 'Invalid fields'
 
-    # Sort logic
-    sort = request.args.get('sort')
-    if sort:
-        if sort == 'price_asc':
-            tickets.sort(key=lambda x: x.get('selling_price', 0))
-        elif sort == 'price_desc':
-            tickets.sort(key=lambda x: x.get('selling_price', 0), reverse=True)
-        elif sort == 'date_asc':
-            tickets.sort(key=lambda x: x.get('datetime', ''))
-        elif sort == 'date_desc':
-            tickets.sort(key=lambda x: x.get('datetime', ''), reverse=True)
-
-    return jsonify(tickets), 200
-    
-
-
-# 2. Report a ticket
+    sort = args.get('sort')
+    if sort not in LISTING_SORTS:
+        sort = None
+
+    key = (city, count or None, sort, tuple(sorted(projection.items())))
+    return (query, projection, sort, key), None
+
+
+# Helper: Serialised listings, from the cache for anonymous requests; returns (body, encoded, cache state)
+def listings_body(query, projection, sort, key):
+    # Signed-in requests always read through; anonymous browsing is served from the cache
+    if request.headers.get('Authorization'):
+        return compact_dumps(load_listings(query, projection, sort)).encode('utf-8'), None, 'bypass'
+    entry, state = listings_cache.get(
+        key, lambda: compact_dumps(load_listings(query, projection, sort)).encode('utf-8')
+    )
+    return entry.body, entry.encoded, state
+
+
+# 1. Get all tickets (public view, only unsold tickets)
+@tickets.route('/tickets', methods=['GET'])
+@rate_limit('browse', '120/minute')
+def get_tickets():
+    params, error = parse_listing_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    body, encoded, state = listings_body(*params)
+    response = body_response(body, encoded=encoded)
+    if state != 'bypass':
+        response.headers['X-Cache'] = state
+    return response, 200
+
+
+# Helper: Stable, anonymised identity of whoever is reporting
+def reporter_fingerprint(user_id):
+    if user_id:
+        identity = f"user:{user_id}"
+    else:
+        identity = f"anon:{request.remote_addr}|{request.user_agent.string}"
+    return hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+
+# Helper: Add one report unless this reporter is already listed; None if they are
+def add_report(ticket_id, fingerprint, counter):
+    other = 'anonymous_count' if counter == 'count' else 'count'
+    now = datetime.utcnow().isoformat()
+    # Two first reports can race on the upsert; the loser retries and then finds the document
+    for attempt in range(2):
+        try:
+            # Filter misses when this reporter is already listed, so the upsert hits the duplicate _id
+            return report_collection.find_one_and_update(
+                {'_id': ticket_id, 'reporters': {'$ne': fingerprint}},
+                {
+                    '$inc': {counter: 1},
+                    '$push': {'reporters': {'$each': [fingerprint], '$slice': -MAX_REPORTER_FINGERPRINTS}},
+                    '$set': {'last_reported_at': now},
+                    '$setOnInsert': {'ticket_id': ticket_id, 'first_reported_at': now, other: 0}
+                },
+                projection={'count': 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            continue
+    return None
+
+
+# 2. Report a ticket (one counter upsert per request, repeat reports are ignored).
+# Anyone may report, but only signed-in reporters count towards auto-hiding: an
+# anonymous identity (IP + User-Agent) is too cheap to fake.
 @tickets.route('/tickets/<ticket_id>/report', methods=['POST'])
+@rate_limit('report', '20/hour', by='user')
 def report_ticket(ticket_id):
-    if ticket_collection.find_one({'_id': ticket_id}):
-        report_collection.insert_one({'ticket_id': ticket_id, 'reported_at': datetime.utcnow().isoformat()})
-        return jsonify({'message': 'Ticket reported'}), 200
-    return jsonify({'error': 'Ticket not found'}), 404
+    ticket = ticket_collection.find_one({'_id': ticket_id}, {'event_name': 1, 'city': 1})
+    if not ticket:
+        return jsonify({'error': 'Ticket not found'}), 404
+
+    user_id = get_optional_user_id()
+    report = add_report(ticket_id, reporter_fingerprint(user_id), 'count' if user_id else 'anonymous_count')
+    if report is None:
+        return jsonify({'message': 'Ticket already reported'}), 200
+
+    # Exactly one request sees the counter reach the threshold
+    if user_id and report['count'] == REPORT_HIDE_THRESHOLD:
+        now = datetime.utcnow().isoformat()
+        ticket_collection.update_one(
+            {'_id': ticket_id},
+            {'$set': {'hidden': True, 'hidden_at': now, 'hidden_by': 'auto:reports'}}
+        )
+        remove_from_active_filters(ticket.get('event_name'), ticket.get('city'))
+        invalidate_listings()
+        invalidate_tickets(ticket_id)
+
+    return jsonify({'message': 'Ticket reported'}), 200
@@ -1,49 +1,40 @@
-from flask import Blueprint, request, jsonify, current_app
-from werkzeug.utils import secure_filename
+from flask import Blueprint, request, jsonify
 from datetime import datetime
-from pymongo import MongoClient
 from dotenv import load_dotenv
-from PIL import Image
-import pytesseract
-import os
 import uuid
 import json
 import re
-import google.generativeai as genai
+import logging
 from utils.auth_utils import token_required
+from utils.storage import get_storage, file_extension
+from utils.images import schedule_derivatives, derivative_urls
+from utils.catalogue import catalogue
+from utils.clients import get_gemini_model, get_ocr
+from utils.metrics import external_call
 from bson import ObjectId
+from utils.db import db
+from utils.response_cache import invalidate_listings
 
 
 load_dotenv()
 
 upload2 = Blueprint('upload2', __name__)
+logger = logging.getLogger(__name__)
 
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
 ticket_collection = db["tickets"]
 active_filters_collection = db["active_filters"]
 users_collection = db["users"]
-movie_names_collection = db["movie_names"]
 
 
-movie_docs = list(movie_names_collection.find({}, {'_id': 0, 'name': 1, 'poster_url': 1}))
-movie_names = [doc['name'] for doc in movie_docs]
-
-
-# Gemini setup
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-1.5-flash")
-
-pytesseract.pytesseract.tesseract_cmd = "/opt/homebrew/bin/tesseract"
+# Gemini and Tesseract are set up on first use, see utils/clients.py
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def extract_using_gemini(ocr_text):
-    movie_names_str = ', '.join(f'"{name}"' for name in movie_names)
+    movie_names_str = ', '.join(f'"{name}"' for name in catalogue.names())
 
     prompt = f"""You will receive ticket text. Your job is to extract the data in this strict format:
 
@@ -66,7 +57,8 @@ def extract_using_gemini(ocr_text):
     """
 
     try:
-        response = model.generate_content(prompt)
+        with external_call('gemini'):
+            response = get_gemini_model().generate_content(prompt)
         match = re.search(r'\{.*\}', response.text, re.DOTALL)
         if match:
             return json.loads(match.group())
@@ -92,7 +84,8 @@ def remove_from_active_filters(movie, city):
         'event_name': movie,
         'city': city,
         'is_sold': False,
-        'deleted': False
+        'deleted': False,
+        'hidden': {'$ne': True}
     })
     if remaining == 0:
         active_filters_collection.update_one(
@@ -109,8 +102,8 @@ def remove_from_active_filters(movie, city):
 @upload2.route('/upload2', methods=['POST'])
 @token_required
 def upload_ticket2():
-    print('request.form:', request.form)
-    print('request.files:', request.files)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("upload2 request", extra={'form_fields': list(request.form), 'files': list(request.files)})
 
     try:
         selling_price = float(request.form.get('selling_price'))
@@ -131,13 +124,11 @@ def upload_ticket2():
     if not allowed_file(image.filename):
         return jsonify({'error': 'Invalid file type'}), 400
 
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    unique_filename = f"{uuid.uuid4().hex}_{secure_filename(image.filename)}"
-    temp_filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
-    image.save(temp_filepath)
-
     try:
-        ocr_text = pytesseract.image_to_string(Image.open(temp_filepath))
+        # OCR straight from the upload stream; the image is only stored once the ticket is valid
+        from PIL import Image
+        with external_call('tesseract'):
+            ocr_text = get_ocr().image_to_string(Image.open(image.stream))
         structured_data = extract_using_gemini(ocr_text)
 
         required = [
@@ -145,21 +136,24 @@ def upload_ticket2():
             'seat_numbers', 'count', 'city'
         ]
         if not all(field in structured_data for field in required):
-            os.remove(temp_filepath)
             return jsonify({'error': 'Missing fields in extracted data', 'data': structured_data}), 400
 
         if not isinstance(structured_data['seat_numbers'], list) or len(structured_data['seat_numbers']) != int(structured_data['count']):
-            os.remove(temp_filepath)
             return jsonify({'error': 'Seat numbers mismatch in extracted data'}), 400
 
-        # ✅ Step 3: Fetch poster_url from movie_names collection
+        # ✅ Step 3: Fetch poster_url from the in-memory movie catalogue
         poster_url = None
+        poster_images = None
         if structured_data.get("event_name"):
-            movie_doc = movie_names_collection.find_one({"name": structured_data["event_name"]})
+            movie_doc = catalogue.lookup(structured_data["event_name"])
             if movie_doc:
                 poster_url = movie_doc.get("poster_url")
+                poster_images = movie_doc.get("poster_images")  # set once the poster is mirrored
 
-        ticket_url = f"/uploads/{unique_filename}"
+        storage = get_storage()
+        image.stream.seek(0)
+        image_key = storage.save(image.stream, file_extension(image.filename))
+        ticket_url = storage.url(image_key)
 
         # ✅ Step 4: Add poster_url to the ticket
         ticket = {
@@ -176,7 +170,9 @@ def upload_ticket2():
             'selling_price': selling_price,
             'contact_info': contact_info,
             'ticket_url': ticket_url,
+            'ticket_images': derivative_urls(image_key),
             'poster_url': poster_url,
+            'poster_images': poster_images,
             'seat_numbers': structured_data['seat_numbers'],
             'count': structured_data['count'],
             'created_at': datetime.utcnow().isoformat(),
@@ -184,10 +180,12 @@ def upload_ticket2():
         }
 
         ticket_collection.insert_one(ticket)
+        # After the insert, so the worker finds the ticket to fill in ticket_images
+        schedule_derivatives(image_key)
         add_to_active_filters(ticket['event_name'], ticket['city'])
+        invalidate_listings()
 
         return jsonify({'message': 'Ticket posted', 'ticket_id': ticket['_id']}), 201
 
     except Exception as e:
-        os.remove(temp_filepath)
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend modules the way app.py does (utils.*, routes.*)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# No background jobs or real services during tests
+os.environ.setdefault('JWT_SECRET', 'test-secret')
+os.environ.setdefault('ARCHIVE_INTERVAL_SECONDS', '0')
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'memory')
+
+
+# MongoDB stand-in. One client for the whole session, because module-level
+# collections (utils/db.py LazyCollection) keep the first client they resolve;
+# the database is dropped before each test instead.
+@pytest.fixture
+def mongo():
+    mongomock = pytest.importorskip('mongomock')
+    from utils import db
+    if not isinstance(db._client, mongomock.MongoClient):
+        db._client = mongomock.MongoClient()
+    db._client.drop_database('ticket_db')
+    return db._client['ticket_db']
+
+
+# Test client of the real app on the MongoDB stand-in, with empty per-worker caches
+@pytest.fixture
+def api(mongo):
+    from app import app
+    from utils.response_cache import listings_cache
+    from utils.ticket_cache import ticket_cache
+    listings_cache.invalidate()
+    ticket_cache.evict(list(ticket_cache._entries))
+    return app.test_client()
+
+
+# auth('<user id>') / auth('<user id>', role='admin') -> Authorization header
+@pytest.fixture
+def auth():
+    import jwt
+    from utils.auth_utils import JWT_SECRET
+
+    def headers(user_id, role='user'):
+        token = jwt.encode({'user_id': user_id, 'role': role}, JWT_SECRET, algorithm='HS256')
+        return {'Authorization': f'Bearer {token}'}
+    return headers
@@ -0,0 +1,51 @@
+import pytest
+
+ADMIN = '64b000000000000000000001'
+OWNER = '64b000000000000000000002'
+
+
+def ticket(ticket_id, **fields):
+    return dict({
+        '_id': ticket_id, 'user_id': OWNER, 'is_sold': False, 'deleted': False,
+        'event_name': 'Leo', 'city': 'Chennai', 'selling_price': 200, 'count': 1
+    }, **fields)
+
+
+def bulk(api, auth, action, ids):
+    response = api.post('/admin/admin/tickets/bulk', json={'action': action, 'ids': ids}, headers=auth(ADMIN, 'admin'))
+    assert response.status_code == 200
+    return {r['ticket_id']: r['status'] for r in response.get_json()['results']}
+
+
+def test_bulk_restore_never_undoes_an_owner_delete(api, auth, mongo):
+    mongo.tickets.insert_many([ticket('owner-deleted', deleted=True, deleted_at='2026-01-01'), ticket('live')])
+
+    assert bulk(api, auth, 'delete', ['owner-deleted', 'live']) == {
+        'owner-deleted': 'already_deleted', 'live': 'deleted'
+    }
+    assert 'deleted_by_admin' not in mongo.tickets.find_one({'_id': 'owner-deleted'})
+
+    assert bulk(api, auth, 'restore', ['owner-deleted', 'live']) == {
+        'owner-deleted': 'restored', 'live': 'restored'
+    }
+    assert mongo.tickets.find_one({'_id': 'owner-deleted'})['deleted'] is True
+    assert mongo.tickets.find_one({'_id': 'live'})['deleted'] is False
+
+
+@pytest.mark.parametrize('action', ['hide', 'delete'])
+def test_moderated_ticket_cannot_be_bought(api, auth, mongo, action):
+    mongo.tickets.insert_one(ticket('t1'))
+    assert bulk(api, auth, action, ['t1']) == {'t1': {'hide': 'hidden', 'delete': 'deleted'}[action]}
+
+    buyer = auth('64b000000000000000000003')
+    assert api.get('/ticket/t1', headers=buyer).status_code == 404
+    assert api.post('/create-order/t1', headers=buyer).status_code == 404
+
+
+
+def test_archived_tickets_are_read_only(api, auth, mongo):
+    mongo.tickets_archive.insert_one(ticket('old', is_sold=True, archived_at='2026-01-01'))
+    assert bulk(api, auth, 'hide', ['old', 'missing']) == {'old': 'archived', 'missing': 'not_found'}
+
+    listed = api.get('/admin/admin/tickets', headers=auth(ADMIN, 'admin')).get_json()['tickets']
+    assert [(t['ticket_id'], t.get('read_only')) for t in listed] == [('old', True)]
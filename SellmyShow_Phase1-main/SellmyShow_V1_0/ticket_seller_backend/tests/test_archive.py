@@ -0,0 +1,66 @@
+import pytest
+
+from utils import archive
+
+
+@pytest.fixture(autouse=True)
+def no_rollups(monkeypatch):
+    # The rollup refresh uses $merge, which the MongoDB stand-in lacks
+    monkeypatch.setattr(archive, 'refresh_rollups', lambda: None)
+
+
+def sold(mongo, count):
+    mongo.tickets.insert_many([
+        {'_id': f's{i}', 'user_id': 'u1', 'is_sold': True, 'deleted': False, 'sold_at': f'2020-01-0{i + 1}T10:00:00'}
+        for i in range(count)
+    ])
+
+
+def test_partial_run_resumes_from_checkpoint(mongo):
+    sold(mongo, 3)
+    mongo.tickets.insert_one({'_id': 'open', 'is_sold': False, 'deleted': False, 'created_at': '2020-01-01'})
+
+    assert archive.archive_tickets(days=30, batch_size=1, max_batches=2) == {'status': 'partial', 'moved': 2, 'batches': 2}
+    checkpoint = mongo.rollup_state.find_one({'_id': archive.ARCHIVE_ID})['checkpoint']
+    assert checkpoint['last'] == ['2020-01-02T10:00:00', 's1']
+
+    assert archive.archive_tickets(days=30, batch_size=1) == {'status': 'done', 'moved': 3, 'batches': 1}
+    assert sorted(mongo.tickets_archive.distinct('_id')) == ['s0', 's1', 's2']
+    assert mongo.tickets.distinct('_id') == ['open']
+
+    # Nothing left to move
+    assert archive.archive_tickets(days=30, batch_size=1) == {'status': 'done', 'moved': 0, 'batches': 0}
+
+
+def test_second_run_is_locked_out(mongo):
+    assert archive.acquire_lease('first')
+    assert archive.archive_tickets(days=30) == {'status': 'locked'}
+
+
+def test_run_stops_when_lease_lost_during_rollups(mongo, monkeypatch):
+    sold(mongo, 2)
+
+    def slow_rollups():
+        # Outlasted the lease; another run took it over
+        mongo.rollup_state.update_one({'_id': archive.ARCHIVE_ID}, {'$set': {'lease_owner': 'other'}})
+    monkeypatch.setattr(archive, 'refresh_rollups', slow_rollups)
+
+    assert archive.archive_tickets(days=30)['status'] == 'lost_lease'
+    assert mongo.tickets.count_documents({}) == 2
+    assert mongo.rollup_state.find_one({'_id': archive.ARCHIVE_ID})['lease_owner'] == 'other'
+
+
+def test_run_stops_when_lease_lost_between_batches(mongo, monkeypatch):
+    sold(mongo, 3)
+    move_batch = archive.move_batch
+
+    def move_then_lose_lease(*args):
+        moved = move_batch(*args)
+        mongo.rollup_state.update_one({'_id': archive.ARCHIVE_ID}, {'$set': {'lease_owner': 'other'}})
+        return moved
+    monkeypatch.setattr(archive, 'move_batch', move_then_lose_lease)
+
+    assert archive.archive_tickets(days=30, batch_size=1) == {'status': 'lost_lease', 'moved': 1, 'batches': 1}
+    assert mongo.tickets.count_documents({}) == 2
+    # The new owner's checkpoint is left alone
+    assert mongo.rollup_state.find_one({'_id': archive.ARCHIVE_ID}).get('checkpoint') is None
@@ -0,0 +1,42 @@
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Runnable scripts, not the helpers they share (benchmarks/common.py)
+SCRIPTS = [
+    path for path in sorted(glob.glob(os.path.join(BACKEND_DIR, 'benchmarks', '*.py')))
+    if "__name__ == '__main__'" in open(path, encoding='utf-8').read()
+]
+
+
+# Every benchmark must at least import and parse its arguments
+@pytest.mark.parametrize('script', SCRIPTS, ids=os.path.basename)
+def test_benchmark_script_starts(script):
+    result = subprocess.run(
+        [sys.executable, script, '--help'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'usage:' in result.stdout
+
+
+def test_startup_report_counts_nested_imports_per_package(monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(BACKEND_DIR, 'benchmarks'))
+    from startup_report import parse_importtime
+
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 |       pymongo.errors',
+        'import time:       400 |        500 |     pymongo',
+        'import time:        50 |        550 |   routes.tickets',
+        'import time:        30 |         30 |     flask.json',
+        'import time:        20 |         50 |   routes.home',
+        'import time:        10 |        610 | app',
+    ])
+    assert parse_importtime(stderr) == {
+        'pymongo': 500, 'routes.tickets': 50, 'flask': 30, 'routes.home': 20, 'app': 10
+    }
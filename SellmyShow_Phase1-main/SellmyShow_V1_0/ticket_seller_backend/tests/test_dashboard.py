@@ -0,0 +1,61 @@
+import pytest
+
+from routes import my_tickets
+
+USER = '64b000000000000000000002'
+OTHER = '64b000000000000000000003'
+
+
+@pytest.fixture
+def stand_in_pipeline(monkeypatch):
+    # The MongoDB stand-in has neither $unionWith nor $convert: drop the archive
+    # union and use plain arithmetic, the rest of the pipeline runs as is
+    real = my_tickets.dashboard_pipeline
+    monkeypatch.setattr(my_tickets, 'ticket_value', lambda: {'$multiply': ['$selling_price', '$count']})
+
+    def pipeline(*args):
+        return [stage for stage in real(*args) if '$unionWith' not in stage]
+    monkeypatch.setattr(my_tickets, 'dashboard_pipeline', pipeline)
+
+
+@pytest.fixture
+def tickets(mongo):
+    docs = [
+        {'_id': f'sell{i}', 'user_id': USER, 'is_sold': False, 'deleted': False,
+         'created_at': f'2026-10-0{i + 1}', 'selling_price': 100, 'count': 2}
+        for i in range(5)
+    ]
+    docs.append({'_id': 'sold0', 'user_id': USER, 'bought_by': OTHER, 'is_sold': True, 'deleted': False,
+                 'sold_at': '2026-10-05', 'selling_price': 300, 'count': 1})
+    docs.append({'_id': 'bought0', 'user_id': OTHER, 'bought_by': USER, 'is_sold': True, 'deleted': False,
+                 'sold_at': '2026-10-06', 'selling_price': 250, 'count': 2})
+    docs.append({'_id': 'gone', 'user_id': USER, 'is_sold': False, 'deleted': True,
+                 'created_at': '2026-10-09', 'selling_price': 999, 'count': 1})
+    mongo.tickets.insert_many(docs)
+
+
+def test_dashboard_pages_each_section(api, auth, tickets, stand_in_pipeline):
+    body = api.get('/me/dashboard?limit=2', headers=auth(USER)).get_json()
+    selling = body['selling']
+    assert [t['ticket_id'] for t in selling['tickets']] == ['sell4', 'sell3']
+    assert (selling['page'], selling['has_more']) == (1, True)
+    assert [t['ticket_id'] for t in body['sold']['tickets']] == ['sold0']
+    assert [t['ticket_id'] for t in body['bought']['tickets']] == ['bought0']
+    assert body['summary'] == {
+        'selling': 5, 'sold': 1, 'bought': 1, 'listed_value': 1000, 'earned': 300, 'spent': 500
+    }
+
+    last = api.get('/me/dashboard?limit=2&selling_page=3&sections=selling', headers=auth(USER)).get_json()
+    assert set(last) == {'limit', 'selling'}
+    assert [t['ticket_id'] for t in last['selling']['tickets']] == ['sell0']
+    assert last['selling']['has_more'] is False
+
+
+@pytest.mark.parametrize('query', ['limit=x', 'selling_page=0x', 'sections=selling,wallet'])
+def test_dashboard_rejects_bad_paging(api, auth, query):
+    assert api.get(f'/me/dashboard?{query}', headers=auth(USER)).status_code == 400
+
+
+def test_dashboard_reads_the_archive_too():
+    pipeline = my_tickets.dashboard_pipeline(USER, {'selling': 1, 'sold': 1, 'bought': 1}, 20, ('sold',))
+    assert pipeline[1] == {'$unionWith': {'coll': 'tickets_archive', 'pipeline': [pipeline[0]]}}
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import app as flask_app
+
+DIGEST = 'ab' + 'cd' + 'e' * 60
+PRIVATE_KEY = f'ab/cd/{DIGEST}.png'
+POSTER_KEY = f'posters/ab/cd/{DIGEST}.png'
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    for key, body in ((PRIVATE_KEY, b'private ticket'), (POSTER_KEY, b'poster')):
+        path = tmp_path / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+    monkeypatch.setitem(flask_app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setitem(flask_app.config, 'UPLOAD_SERVE_MODE', 'flask')
+    return flask_app.test_client()
+
+
+def test_poster_is_public(client):
+    response = client.get(f'/posters/ab/cd/{DIGEST}.png')
+    assert response.status_code == 200
+    assert response.data == b'poster'
+    assert 'public' in response.headers['Cache-Control']
+
+
+@pytest.mark.parametrize('path', [
+    f'/posters/%2e%2e/ab/cd/{DIGEST}.png',
+    f'/posters/..%2fab/cd/{DIGEST}.png',
+    f'/posters/ab/..%2f..%2fab/cd/{DIGEST}.png',
+    f'/posters/..%5cab/cd/{DIGEST}.png',
+    '/posters/..%2f.tmp/anything',
+])
+def test_poster_route_cannot_reach_private_uploads(client, path):
+    response = client.get(path)
+    assert response.status_code == 404
+    assert b'private ticket' not in response.data
+
+
+def test_private_upload_needs_token(client):
+    assert client.get(f'/uploads/{PRIVATE_KEY}').status_code == 401
+
+
+def test_s3_branch_checks_prefix_too(client, monkeypatch):
+    from utils import file_serving
+
+    class FakeS3:
+        name = 's3'
+
+        def exists(self, key):
+            return True
+
+        def presigned_url(self, key):
+            return f'https://bucket.example/{key}'
+
+    monkeypatch.setattr(file_serving, 'storage_for', lambda key: FakeS3())
+    assert client.get(f'/posters/%2e%2e/ab/cd/{DIGEST}.png').status_code == 404
+    response = client.get(f'/posters/ab/cd/{DIGEST}.png')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(POSTER_KEY)
+
+
+def test_signed_link_opens_a_private_upload_without_token(client, auth):
+    response = client.get(f'/upload-link?path=/uploads/{PRIVATE_KEY}', headers=auth('64b000000000000000000002'))
+    assert response.status_code == 200
+    url = response.get_json()['url']
+    assert url.startswith(f'/uploads/{PRIVATE_KEY}?expires=')
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data == b'private ticket'
+
+
+def test_signed_link_is_bound_to_key_and_expiry(client, auth, monkeypatch):
+    from utils import file_serving
+
+    assert client.get(f'/upload-link?path=/uploads/{PRIVATE_KEY}').status_code == 401
+    url = client.get(f'/upload-link?path=/uploads/{PRIVATE_KEY}', headers=auth('64b000000000000000000002')).get_json()['url']
+    query = url.split('?', 1)[1]
+
+    other = f'ab/cd/{"f" * 64}.png'
+    assert client.get(f'/uploads/{other}?{query}').status_code == 401
+    assert client.get(url.replace('sig=', 'sig=0')).status_code == 401
+
+    expires = int(query.split('expires=')[1].split('&')[0])
+    monkeypatch.setattr(file_serving, 'time', SimpleNamespace(time=lambda: expires + 1))
+    assert client.get(url).status_code == 401
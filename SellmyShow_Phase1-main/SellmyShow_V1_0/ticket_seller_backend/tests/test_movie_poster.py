@@ -0,0 +1,62 @@
+import os
+
+from utils import movie_poster
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'bms')
+
+
+def read_fixture(city):
+    with open(os.path.join(FIXTURES, f'{city}.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_parser_keeps_only_named_portrait_posters():
+    movies = movie_poster.parse_movies(read_fixture('coimbatore'))
+    assert [m['name'] for m in movies] == ['Leo', 'Jailer', 'Spider-Man: Across the Spider-Verse']
+    assert movies[0]['poster_url'].endswith('et00351731-portrait.jpg')
+    # lazy-loaded cards carry the URL in data-src
+    assert movies[2]['poster_url'].endswith('et00329502-portrait.jpg')
+
+
+def test_names_merge_across_cities():
+    results = {city: movie_poster.parse_movies(read_fixture(city)) for city in ('coimbatore', 'chennai')}
+    merged = movie_poster.merge_movies(results)
+    assert set(merged) == {'leo', 'jailer', 'spider man across the spider verse', 'vikram'}
+    assert merged['leo']['cities'] == {'coimbatore', 'chennai'}
+
+
+def test_ingest_from_fixtures_is_idempotent(mongo):
+    stats = movie_poster.ingest(['coimbatore', 'chennai'], fixtures_dir=FIXTURES)
+    assert stats['source'] == 'fixtures'
+    assert stats['failed_cities'] == {}
+    assert stats['cities'] == {'coimbatore': 3, 'chennai': 2}
+    assert stats['inserted'] == 4
+
+    leo = mongo.movie_names.find_one({'name_key': 'leo'})
+    assert sorted(leo['cities']) == ['chennai', 'coimbatore']
+    assert leo['poster_source_url'] == leo['poster_url']
+
+    again = movie_poster.ingest(['coimbatore', 'chennai'], fixtures_dir=FIXTURES)
+    assert (again['inserted'], again['updated'], again['unchanged']) == (0, 0, 4)
+    assert mongo.movie_names.count_documents({}) == 4
+    assert mongo.catalogue_runs.count_documents({}) == 2
+
+
+def test_missing_city_fixture_is_reported(mongo):
+    stats = movie_poster.ingest(['coimbatore', 'madurai'], fixtures_dir=FIXTURES)
+    assert list(stats['failed_cities']) == ['madurai']
+    assert stats['inserted'] == 3
+
+
+def test_name_key_backfill_runs_once(mongo):
+    mongo.movie_names.insert_many([
+        {'name': 'Leo'}, {'name': 'LEO!'}, {'name': 'Jailer'}
+    ])
+    assert movie_poster.backfill_name_keys() == 1
+    assert sorted(d['name_key'] for d in mongo.movie_names.find()) == ['jailer', 'leo']
+    assert movie_poster.NAME_KEY_INDEX in mongo.movie_names.index_information()
+
+    # Migrated: later runs only look at the index list
+    mongo.movie_names.insert_one({'name': 'Leo', 'name_key': 'leo-copy'})
+    assert movie_poster.backfill_name_keys() == 0
+    assert mongo.movie_names.count_documents({}) == 3
@@ -0,0 +1,87 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from utils import rate_limit
+from utils.rate_limit import MemoryBackend, MongoBackend
+
+NOW = time.time() // 60 * 60 + 20  # 20 s into the current minute window
+
+
+@pytest.fixture(autouse=True)
+def fresh_limits(monkeypatch):
+    monkeypatch.setattr(rate_limit, '_backend', MemoryBackend())
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(time=lambda: NOW))
+
+
+def limited_app():
+    app = Flask(__name__)
+
+    @app.route('/ping')
+    @rate_limit.rate_limit('test_ping', '3/minute')
+    def ping():
+        return 'pong'
+
+    return app.test_client()
+
+
+def test_limit_applies_per_client_ip():
+    client = limited_app()
+    for _ in range(3):
+        assert client.get('/ping').status_code == 200
+    response = client.get('/ping')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) == 40
+    assert client.get('/ping', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
+
+
+@pytest.mark.parametrize('proxy_count, second_client_status', [(1, 200), (0, 429)])
+def test_proxy_count_separates_clients_behind_nginx(mongo, monkeypatch, proxy_count, second_client_status):
+    from app import create_app
+    monkeypatch.setenv('PROXY_COUNT', str(proxy_count))
+    client = create_app().test_client()
+
+    def get(ip):
+        return client.get('/cinema-data', headers={'X-Forwarded-For': ip}).status_code
+
+    assert [get('203.0.113.1') for _ in range(60)] == [200] * 60
+    assert get('203.0.113.1') == 429
+    # Without ProxyFix every client is nginx's address and shares one counter
+    assert get('203.0.113.2') == second_client_status
+
+
+def test_mongo_backend_keeps_one_document_per_key(mongo):
+    backend = MongoBackend()
+    index = int(NOW // 60)
+    for _ in range(3):
+        backend.hit('browse:ip:1', 60, index)
+    assert backend.hit('browse:ip:1', 60, index + 1) == (3, 1)
+    assert backend.hit('browse:ip:1', 60, index + 2) == (1, 1)
+
+    # The window before the previous one is dropped on the way
+    doc = mongo.rate_limits.find_one({'_id': 'browse:ip:1'})
+    assert doc['counts'] == {str(index + 1): 1, str(index + 2): 1}
+    assert mongo.rate_limits.count_documents({}) == 1
+
+
+def test_previous_window_still_counts_while_it_slides_out(monkeypatch):
+    # Three hits late in the previous window...
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(time=lambda: NOW - 30))
+    for _ in range(3):
+        assert rate_limit.check('burst', 3, 60, 'ip:1') is None
+
+    # ...still weigh 3 * 40/60 = 2 at 20 s into this one, so only one more gets through
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(time=lambda: NOW))
+    assert rate_limit.check('burst', 3, 60, 'ip:1') is None
+    # Retry-After: until 2/3 of the previous window has slid out, 40 s in (float rounding may add 1)
+    assert rate_limit.check('burst', 3, 60, 'ip:1') in (20, 21)
+
+
+def test_backend_failure_lets_requests_through(monkeypatch):
+    class Down:
+        def hit(self, key, window, index):
+            raise ConnectionError('rate limit store unreachable')
+    monkeypatch.setattr(rate_limit, '_backend', Down())
+    assert rate_limit.check('browse', 1, 60, 'ip:1') is None
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from utils.response_cache import ResponseCache
+
+SELLER = '64b000000000000000000002'
+
+
+def listing(mongo, ticket_id='t1', price=200):
+    mongo.tickets.insert_one({
+        '_id': ticket_id, 'user_id': SELLER, 'is_sold': False, 'deleted': False,
+        'event_name': 'Leo', 'city': 'Chennai', 'venue': 'PVR', 'selling_price': price, 'count': 1
+    })
+
+
+def prices(response):
+    return [t['selling_price'] for t in response.get_json()]
+
+
+def test_anonymous_listings_are_cached_until_a_write(api, auth, mongo):
+    listing(mongo)
+    first = api.get('/tickets')
+    assert first.headers['X-Cache'] == 'miss'
+    second = api.get('/tickets')
+    assert second.headers['X-Cache'] == 'hit'
+    assert second.data == first.data
+
+    # A write behind the API's back is not seen while the entry is fresh...
+    mongo.tickets.update_one({'_id': 't1'}, {'$set': {'selling_price': 150}})
+    assert prices(api.get('/tickets')) == [200]
+
+    # ...but a write through the API drops it, here and (via cache_meta) in other workers
+    response = api.patch('/my-tickets/t1/price', json={'new_price': 120}, headers=auth(SELLER))
+    assert response.status_code == 200
+    refreshed = api.get('/tickets')
+    assert refreshed.headers['X-Cache'] == 'miss'
+    assert prices(refreshed) == [120]
+    assert mongo.cache_meta.find_one({'_id': 'tickets'})['version'] >= 1
+
+
+def test_signed_in_listings_bypass_the_cache(api, auth, mongo):
+    listing(mongo)
+    api.get('/tickets')
+    mongo.tickets.update_one({'_id': 't1'}, {'$set': {'selling_price': 150}})
+    response = api.get('/tickets', headers=auth(SELLER))
+    assert 'X-Cache' not in response.headers
+    assert prices(response) == [150]
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache('test', 'test')
+    cache._watching = True  # no version polling thread
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return b'[]'
+
+    threads = [threading.Thread(target=cache.get, args=('key', compute)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+
+
+def test_entry_built_before_an_invalidation_is_not_stored():
+    cache = ResponseCache('test', 'test')
+    cache._watching = True
+
+    def compute():
+        cache.invalidate()  # a write lands while the query runs
+        return b'old'
+
+    cache.get('key', compute)
+    entry, state = cache.get('key', lambda: b'new')
+    assert (entry.body, state) == (b'new', 'miss')
@@ -0,0 +1,19 @@
+import pytest
+from flask import Flask
+
+from utils.response_utils import pick_encoding
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate, br', 'br'),
+    ('br;q=0, gzip', 'gzip'),
+    ('BR;Q=0, GZIP', 'gzip'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+    ('br;q=0, gzip;q=0', None),
+    ('*', 'br'),
+    ('*;q=0.1, br;q=0', 'gzip'),
+    ('', None),
+])
+def test_pick_encoding_honours_q_values(header, expected):
+    with Flask(__name__).test_request_context(headers={'Accept-Encoding': header}):
+        assert pick_encoding() == expected
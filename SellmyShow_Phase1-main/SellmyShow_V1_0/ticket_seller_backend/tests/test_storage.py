@@ -0,0 +1,93 @@
+import io
+
+import pytest
+
+from utils import storage
+
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    moto = pytest.importorskip('moto')
+    boto3 = pytest.importorskip('boto3')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with moto.mock_aws():
+        boto3.client('s3').create_bucket(Bucket='uploads')
+        yield storage.S3Storage('uploads', prefix='media')
+
+
+def test_s3_save_is_content_addressed(s3_storage):
+    key = s3_storage.save(io.BytesIO(b'ticket image'), 'JPG')
+    assert storage.is_content_key(key)
+    assert key.endswith('.jpg')
+    assert s3_storage.exists(key)
+    assert s3_storage.open(key).read() == b'ticket image'
+    assert s3_storage.url(key) == f'/uploads/{key}'
+
+    # Same bytes, same key, one object (under the configured prefix)
+    assert s3_storage.save(io.BytesIO(b'ticket image'), 'jpg') == key
+    listed = s3_storage.client.list_objects_v2(Bucket='uploads')['Contents']
+    assert [o['Key'] for o in listed] == [f'media/{key}']
+
+
+def test_s3_spools_large_uploads(s3_storage):
+    data = b'x' * (storage.SPOOL_MAX_SIZE + 1)
+    key = s3_storage.save(io.BytesIO(data), 'png', prefix=storage.PUBLIC_PREFIX)
+    assert key.startswith(storage.PUBLIC_PREFIX)
+    assert s3_storage.open(key).read() == data
+    assert s3_storage.url(key).startswith('/posters/')
+
+
+def test_s3_presigned_url_and_missing_key(s3_storage):
+    key = s3_storage.save(io.BytesIO(b'abc'), 'png')
+    assert 'media/' + key in s3_storage.presigned_url(key)
+    assert not s3_storage.exists(key.replace(key[-10:-4], '000000'))
+
+
+def test_shared_upload_survives_one_owner_deleting(api, auth, tmp_path, monkeypatch):
+    from app import app
+    local = storage.LocalStorage(str(tmp_path))
+    monkeypatch.setattr(storage, '_storage', local)
+    monkeypatch.setattr(storage, '_local_storage', local)
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+
+    # Two sellers upload the same file: content addressing stores it once
+    sellers = [auth('64b000000000000000000001'), auth('64b000000000000000000002')]
+    urls, ticket_ids = [], []
+    for headers in sellers:
+        response = api.post('/upload', headers=headers,
+                            data={'file': (io.BytesIO(b'%PDF-1.4 same ticket'), 'ticket.pdf')})
+        assert response.status_code == 200
+        urls.append(response.get_json()['file_url'])
+        response = api.post('/tickets', headers=headers, json={
+            'event_name': 'Leo', 'venue': 'PVR', 'datetime': '2026-11-01T19:00', 'original_price': 200,
+            'selling_price': 180, 'contact_info': '9000000000', 'ticket_url': urls[-1],
+            'seat_numbers': ['A1'], 'count': 1, 'city': 'Chennai'
+        })
+        assert response.status_code == 201
+        ticket_ids.append(response.get_json()['ticket_id'])
+    assert urls[0] == urls[1]
+
+    # The first seller deleting their ticket must not take the second one's file with it
+    assert api.delete(f'/my-tickets/{ticket_ids[0]}', headers=sellers[0]).status_code == 200
+    response = api.get(urls[1], headers=sellers[1])
+    assert response.status_code == 200
+    assert response.data == b'%PDF-1.4 same ticket'
+
+
+def test_local_save_roundtrip(tmp_path):
+    local = storage.LocalStorage(str(tmp_path))
+    key = local.save(io.BytesIO(b'hello'), 'png')
+    assert local.save(io.BytesIO(b'hello'), 'png') == key
+    with local.open(key) as f:
+        assert f.read() == b'hello'
+    assert local.path('.tmp/anything') is None
+
+
+def test_legacy_keys_fall_back_to_local(monkeypatch, s3_storage):
+    monkeypatch.setattr(storage, '_storage', s3_storage)
+    digest = 'a' * 64
+    assert storage.storage_for(f'aa/aa/{digest}.jpg') is s3_storage
+    assert storage.storage_for(f'aa/aa/{digest}.card.webp') is s3_storage
+    assert storage.storage_for('3f2c1d_ticket.jpg').name == 'local'
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from utils import ticket_cache as tc
+
+SELLER = '64b000000000000000000002'
+BUYER = '64b000000000000000000003'
+
+
+def test_ticket_detail_is_cached_until_a_write(api, auth, mongo):
+    mongo.tickets.insert_one({
+        '_id': 't1', 'user_id': SELLER, 'is_sold': False, 'deleted': False,
+        'event_name': 'Leo', 'city': 'Chennai', 'selling_price': 200, 'count': 1
+    })
+    assert api.get('/ticket/t1', headers=auth(BUYER)).get_json()['selling_price'] == 200
+
+    # Served from the cache while fresh
+    mongo.tickets.update_one({'_id': 't1'}, {'$set': {'selling_price': 150}})
+    assert api.get('/ticket/t1', headers=auth(BUYER)).get_json()['selling_price'] == 200
+
+    # A write through the API evicts it and records it for the other workers
+    assert api.patch('/my-tickets/t1/price', json={'new_price': 120}, headers=auth(SELLER)).status_code == 200
+    assert api.get('/ticket/t1', headers=auth(BUYER)).get_json()['selling_price'] == 120
+    assert mongo.cache_invalidations.count_documents({'ticket_id': 't1'}) == 1
+
+    # Deleting it takes it off the detail page at once
+    assert api.delete('/my-tickets/t1', headers=auth(SELLER)).status_code == 200
+    assert api.get('/ticket/t1', headers=auth(BUYER)).status_code == 404
+
+
+def test_lru_drops_least_recently_used_and_expired(monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(tc, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    cache = tc.LRUCache('test', ttl=30, max_entries=2)
+
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1   # a is now the most recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+    clock.now = 31
+    assert cache.get('a') is None
@@ -0,0 +1,174 @@
+from pymongo import ASCENDING, DESCENDING
+from dotenv import load_dotenv
+from datetime import datetime, timedelta
+from statistics import median
+import os
+import threading
+from utils.db import db
+
+load_dotenv()
+
+ticket_collection = db["tickets"]
+stats_collection = db["ticket_stats_daily"]    # one doc per (day, movie, city)
+rollup_state = db["rollup_state"]              # refresh checkpoints
+
+ROLLUP_ID = 'ticket_stats_daily'
+STATS_REFRESH_SECONDS = int(os.getenv("STATS_REFRESH_SECONDS", 60))
+GROUP_FIELDS = {'movie', 'city', 'day'}
+
+_indexes_ready = False
+_refresh_lock = threading.Lock()
+
+
+def ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    ticket_collection.create_index([('sold_at', ASCENDING)], sparse=True)
+    ticket_collection.create_index([('created_at', ASCENDING)])
+    _indexes_ready = True
+
+
+# ISO strings -> Date, dropping microseconds (utcnow().isoformat() has six digits)
+def iso_to_date(field):
+    return {
+        '$dateFromString': {
+            'dateString': {'$substrCP': [{'$ifNull': [field, '']}, 0, 19]},
+            'onError': None,
+            'onNull': None
+        }
+    }
+
+
+def sales_pipeline(since_day):
+    return [
+        {'$match': {'is_sold': True, 'sold_at': {'$gte': since_day}}},
+        {'$project': {
+            'key': {
+                'day': {'$substrCP': ['$sold_at', 0, 10]},
+                'movie': '$event_name',
+                'city': '$city'
+            },
+            # $convert, so one malformed ticket cannot fail the whole refresh
+            'tickets': {'$convert': {'input': '$count', 'to': 'int', 'onError': 1, 'onNull': 1}},
+            'price': {'$convert': {'input': '$selling_price', 'to': 'double', 'onError': 0, 'onNull': 0}},
+            'sell_ms': {'$subtract': [iso_to_date('$sold_at'), iso_to_date('$created_at')]}
+        }},
+        {'$group': {
+            '_id': '$key',
+            'sold': {'$sum': 1},
+            'tickets_sold': {'$sum': '$tickets'},
+            'gmv': {'$sum': {'$multiply': ['$price', '$tickets']}},
+            'sell_seconds': {'$push': {'$divide': ['$sell_ms', 1000]}}
+        }},
+        {'$merge': {'into': ROLLUP_ID, 'on': '_id', 'whenMatched': 'merge', 'whenNotMatched': 'insert'}}
+    ]
+
+
+def listings_pipeline(since_day):
+    return [
+        {'$match': {'created_at': {'$gte': since_day}}},
+        {'$group': {
+            '_id': {
+                'day': {'$substrCP': ['$created_at', 0, 10]},
+                'movie': '$event_name',
+                'city': '$city'
+            },
+            'listed': {'$sum': 1}
+        }},
+        {'$merge': {'into': ROLLUP_ID, 'on': '_id', 'whenMatched': 'merge', 'whenNotMatched': 'insert'}}
+    ]
+
+
+def latest_value(field, query):
+    doc = ticket_collection.find_one(query, {field: 1}, sort=[(field, DESCENDING)])
+    return doc.get(field) if doc else None
+
+
+# Re-aggregate only the days touched since the last checkpoint. Whole days are
+# recomputed, so $merge can overwrite a bucket's fields without double counting.
+def refresh_rollups():
+    ensure_indexes()
+    state = rollup_state.find_one({'_id': ROLLUP_ID}) or {}
+
+    # Read the high-water marks first; anything landing mid-run is picked up next time
+    sold_through = latest_value('sold_at', {'is_sold': True})
+    created_through = latest_value('created_at', {})
+
+    sales_since = (state.get('sold_through') or '')[:10]
+    listings_since = (state.get('created_through') or '')[:10]
+
+    if sold_through:
+        ticket_collection.aggregate(sales_pipeline(sales_since))
+    if created_through:
+        ticket_collection.aggregate(listings_pipeline(listings_since))
+
+    rollup_state.update_one(
+        {'_id': ROLLUP_ID},
+        {'$set': {
+            'sold_through': sold_through or state.get('sold_through'),
+            'created_through': created_through or state.get('created_through'),
+            'refreshed_at': datetime.utcnow()
+        }},
+        upsert=True
+    )
+
+
+def locked_refresh():
+    # Only one refresh per process at a time; concurrent callers just skip
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        refresh_rollups()
+    finally:
+        _refresh_lock.release()
+
+
+# First build runs inline; after that stale rollups are served while a
+# background thread brings them up to date.
+def refresh_if_stale():
+    state = rollup_state.find_one({'_id': ROLLUP_ID}, {'refreshed_at': 1})
+    refreshed_at = state.get('refreshed_at') if state else None
+    if not refreshed_at:
+        locked_refresh()
+    elif datetime.utcnow() - refreshed_at > timedelta(seconds=STATS_REFRESH_SECONDS):
+        if not _refresh_lock.locked():  # one refresh in flight is enough
+            threading.Thread(target=locked_refresh, daemon=True).start()
+
+
+# Combine daily buckets into one row per movie, city or day
+def read_stats(group_by, day_from=None, day_to=None):
+    query = {}
+    if day_from or day_to:
+        query['_id.day'] = {}
+        if day_from:
+            query['_id.day']['$gte'] = day_from
+        if day_to:
+            query['_id.day']['$lte'] = day_to
+
+    groups = {}
+    for bucket in stats_collection.find(query):
+        key = bucket['_id'].get(group_by)
+        row = groups.setdefault(key, {
+            group_by: key, 'listed': 0, 'sold': 0, 'tickets_sold': 0, 'gmv': 0.0, 'sell_seconds': []
+        })
+        row['listed'] += bucket.get('listed', 0)
+        row['sold'] += bucket.get('sold', 0)
+        row['tickets_sold'] += bucket.get('tickets_sold', 0)
+        row['gmv'] += bucket.get('gmv', 0)
+        row['sell_seconds'].extend(s for s in bucket.get('sell_seconds', []) if s is not None)
+
+    result = []
+    for row in groups.values():
+        seconds = row.pop('sell_seconds')
+        row['gmv'] = round(row['gmv'], 2)
+        # Per day, sales (by sold_at) and listings (by created_at) are different tickets, so no rate
+        if group_by == 'day':
+            row['sell_through_rate'] = None
+        else:
+            row['sell_through_rate'] = round(row['sold'] / row['listed'], 4) if row['listed'] else None
+        row['median_time_to_sell_seconds'] = median(seconds) if seconds else None
+        result.append(row)
+
+    result.sort(key=lambda r: (r[group_by] is None, r[group_by] or ''))
+    return result
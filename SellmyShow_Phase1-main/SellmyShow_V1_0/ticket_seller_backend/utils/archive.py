@@ -0,0 +1,208 @@
+# Move old sold and soft-deleted tickets out of the hot tickets collection.
+#
+# Tickets sold (sold_at) or deleted (deleted_at, or created_at for tickets
+# deleted before deleted_at existed) more than ARCHIVE_AFTER_DAYS ago are copied
+# into tickets_archive and then removed from tickets, ARCHIVE_BATCH_SIZE at a
+# time, oldest first. The copy is an upsert, so a batch interrupted between the
+# copy and the delete is simply moved again on the next run.
+#
+# Progress is checkpointed in rollup_state after every batch (cutoff, rule, last
+# key), so a run that dies resumes where it stopped instead of rescanning. A
+# lease on the same document keeps two workers or cron runs from archiving at
+# once; every checkpoint renews it, and a run that finds it taken over stops. Readers that must see every ticket (/my-tickets, /bought-tickets,
+# /me/dashboard, the admin views) read both collections.
+#
+#   python -m utils.archive                  # archive everything that is due
+#   python -m utils.archive --max-batches 10 # or just some of it
+#
+# Inside the API a background thread runs it every ARCHIVE_INTERVAL_SECONDS
+# (0 turns it off, e.g. when cron runs the command above instead).
+
+import argparse
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from dotenv import load_dotenv
+from utils.db import db
+from utils.analytics import refresh_rollups
+from utils.ticket_cache import invalidate_tickets
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ticket_collection = db["tickets"]
+archive_collection = db["tickets_archive"]
+rollup_state = db["rollup_state"]              # also holds the archive checkpoint
+
+ARCHIVE_ID = 'tickets_archive'
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 90))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", 3600))
+LEASE_SECONDS = 300
+
+# What gets archived, and the date field that ages it; worked through in this order
+ARCHIVE_RULES = [
+    ('sold', {'is_sold': True}, 'sold_at'),
+    ('deleted', {'deleted': True, 'is_sold': {'$ne': True}}, 'deleted_at'),
+    ('deleted_legacy', {'deleted': True, 'is_sold': {'$ne': True}, 'deleted_at': {'$exists': False}}, 'created_at'),
+]
+
+_indexes_ready = False
+_started = False
+_start_lock = threading.Lock()
+
+
+def ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    ticket_collection.create_index([('sold_at', ASCENDING)], sparse=True)
+    ticket_collection.create_index([('deleted_at', ASCENDING)], sparse=True)
+    # Archive reads: a seller's and a buyer's tickets
+    archive_collection.create_index([('user_id', ASCENDING)])
+    archive_collection.create_index([('bought_by', ASCENDING)], sparse=True)
+    _indexes_ready = True
+
+
+# Helper: Take the lease (False if another run holds it)
+def acquire_lease(owner):
+    now = datetime.utcnow()
+    try:
+        rollup_state.find_one_and_update(
+            {'_id': ARCHIVE_ID, '$or': [{'lease_until': {'$lt': now}}, {'lease_until': None}]},
+            {'$set': {'lease_owner': owner, 'lease_until': now + timedelta(seconds=LEASE_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+# Saves progress and renews the lease; False once another run has taken the lease over
+def save_checkpoint(owner, fields=None):
+    fields = dict(fields or {}, lease_until=datetime.utcnow() + timedelta(seconds=LEASE_SECONDS))
+    result = rollup_state.update_one({'_id': ARCHIVE_ID, 'lease_owner': owner}, {'$set': fields})
+    return result.matched_count == 1
+
+
+# Helper: Next batch for a rule, strictly after the last (date, _id) key handled
+def next_batch(match, field, cutoff, last, batch_size):
+    query = dict(match)
+    query[field] = {'$lt': cutoff}
+    if last:
+        query['$or'] = [{field: {'$gt': last[0]}}, {field: last[0], '_id': {'$gt': last[1]}}]
+    return list(ticket_collection.find(query).sort([(field, ASCENDING), ('_id', ASCENDING)]).limit(batch_size))
+
+
+def move_batch(docs, match, field, cutoff):
+    now = datetime.utcnow().isoformat()
+    ids = [d['_id'] for d in docs]
+    archive_collection.bulk_write(
+        [ReplaceOne({'_id': d['_id']}, dict(d, archived_at=now), upsert=True) for d in docs],
+        ordered=False
+    )
+    # Same conditions again, so a ticket changed since it was read stays hot
+    query = dict(match)
+    query[field] = {'$lt': cutoff}
+    query['_id'] = {'$in': ids}
+    moved = ticket_collection.delete_many(query).deleted_count
+    if moved < len(ids):
+        kept = ticket_collection.distinct('_id', {'_id': {'$in': ids}})
+        if kept:
+            archive_collection.delete_many({'_id': {'$in': kept}})  # never listed twice
+    invalidate_tickets(*ids)
+    return moved
+
+
+def archive_tickets(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, max_batches=None):
+    owner = uuid.uuid4().hex
+    if not acquire_lease(owner):
+        return {'status': 'locked'}
+    ensure_indexes()
+    # Roll sales up before they leave the collection /admin/stats aggregates
+    refresh_rollups()
+    # That can outlast the lease; only go on if it is still ours
+    if not save_checkpoint(owner):
+        logger.warning("Archive lease lost while refreshing rollups, stopping")
+        return {'status': 'lost_lease', 'moved': 0, 'batches': 0}
+
+    state = rollup_state.find_one({'_id': ARCHIVE_ID}) or {}
+    checkpoint = state.get('checkpoint')
+    if checkpoint:
+        logger.info("Resuming ticket archival", extra={'rule': checkpoint['rule'], 'moved': checkpoint['moved']})
+    else:
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        checkpoint = {'cutoff': cutoff, 'rule': ARCHIVE_RULES[0][0], 'last': None, 'moved': 0}
+
+    names = [rule[0] for rule in ARCHIVE_RULES]
+    batches = 0
+    try:
+        for name, match, field in ARCHIVE_RULES[names.index(checkpoint['rule']):]:
+            if name != checkpoint['rule']:
+                checkpoint.update(rule=name, last=None)
+            while max_batches is None or batches < max_batches:
+                docs = next_batch(match, field, checkpoint['cutoff'], checkpoint['last'], batch_size)
+                if not docs:
+                    break
+                checkpoint['moved'] += move_batch(docs, match, field, checkpoint['cutoff'])
+                checkpoint['last'] = [docs[-1].get(field), docs[-1]['_id']]
+                batches += 1
+                if not save_checkpoint(owner, {'checkpoint': checkpoint}):
+                    # Another run owns the checkpoint now; this batch is safe to redo
+                    logger.warning("Archive lease lost, stopping", extra={'moved': checkpoint['moved']})
+                    return {'status': 'lost_lease', 'moved': checkpoint['moved'], 'batches': batches}
+            else:
+                # Out of batches for this run; the checkpoint picks it up next time
+                return {'status': 'partial', 'moved': checkpoint['moved'], 'batches': batches}
+
+        if not save_checkpoint(owner, {
+            'checkpoint': None,
+            'last_run': {'cutoff': checkpoint['cutoff'], 'moved': checkpoint['moved'], 'finished_at': datetime.utcnow()}
+        }):
+            logger.warning("Archive lease lost before the run was recorded", extra={'moved': checkpoint['moved']})
+            return {'status': 'lost_lease', 'moved': checkpoint['moved'], 'batches': batches}
+        logger.info("Ticket archival finished", extra={'moved': checkpoint['moved'], 'batches': batches})
+        return {'status': 'done', 'moved': checkpoint['moved'], 'batches': batches}
+    finally:
+        rollup_state.update_one({'_id': ARCHIVE_ID, 'lease_owner': owner}, {'$set': {'lease_until': None}})
+
+
+def run_periodically():
+    while True:
+        try:
+            archive_tickets()
+        except Exception:
+            logger.exception("Ticket archival failed")
+        time.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+
+# Started on first use, so it runs in the gunicorn worker rather than the master
+def start_archiver():
+    global _started
+    if _started:
+        return
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=run_periodically, daemon=True, name='ticket-archiver').start()
+
+
+def init_archiver(app):
+    if ARCHIVE_INTERVAL_SECONDS > 0:
+        app.before_request(start_archiver)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move old sold and deleted tickets into tickets_archive')
+    parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument('--max-batches', type=int)
+    args = parser.parse_args()
+    print(archive_tickets(days=args.days, batch_size=args.batch_size, max_batches=args.max_batches))
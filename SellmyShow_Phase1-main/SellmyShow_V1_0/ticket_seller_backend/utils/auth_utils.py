@@ -5,7 +5,11 @@ import os
 from dotenv import load_dotenv
 
 load_dotenv()
+# Signs and verifies every session token (routes/auth.py); no default, so a
+# deploy without it fails at startup instead of running on a known key
 JWT_SECRET = os.getenv("JWT_SECRET")
+if not JWT_SECRET:
+    raise RuntimeError("JWT_SECRET must be set")
 
 def token_required(f):
     @wraps(f)
@@ -26,6 +30,18 @@ def token_required(f):
     return decorated
 
 
+# User ID from a valid bearer token, or None for anonymous/invalid requests
+def get_optional_user_id():
+    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    return payload.get('user_id')
+
+
 def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
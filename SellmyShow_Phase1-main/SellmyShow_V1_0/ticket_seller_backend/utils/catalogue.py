@@ -0,0 +1,79 @@
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from dotenv import load_dotenv
+from utils.db import db
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+movie_names_collection = db["movie_names"]
+meta_collection = db["catalogue_meta"]
+
+VERSION_ID = 'movie_names'
+POLL_SECONDS = int(os.getenv("CATALOGUE_POLL_SECONDS", 30))
+# Reload even without a version bump, in case movie_names was edited by hand
+MAX_AGE_SECONDS = int(os.getenv("CATALOGUE_MAX_AGE_SECONDS", 600))
+
+Snapshot = namedtuple('Snapshot', ['version', 'loaded_at', 'names', 'by_name'])
+
+
+# Writers (catalogue ingest, poster mirror) call this after changing movie_names
+def bump_catalogue_version():
+    meta_collection.update_one({'_id': VERSION_ID}, {'$inc': {'version': 1}}, upsert=True)
+
+
+# In-memory copy of movie_names. Loaded on first use, kept fresh by a background
+# thread that polls a version counter, and replaced as a whole so readers always
+# see one consistent snapshot without touching the database.
+class MovieCatalogue:
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def current_version(self):
+        doc = meta_collection.find_one({'_id': VERSION_ID}, {'version': 1})
+        return doc.get('version', 0) if doc else 0
+
+    def load(self, version):
+        docs = list(movie_names_collection.find({}, {'_id': 0, 'name': 1, 'poster_url': 1, 'poster_images': 1}))
+        by_name = {doc['name']: doc for doc in docs if doc.get('name')}
+        return Snapshot(version, time.monotonic(), tuple(by_name), by_name)
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self.load(self.current_version())
+                    # Started lazily, so it runs in the gunicorn worker rather than the master
+                    threading.Thread(target=self.poll, daemon=True, name='catalogue-refresh').start()
+                snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self, force=False):
+        version = self.current_version()
+        snapshot = self._snapshot
+        stale = time.monotonic() - snapshot.loaded_at > MAX_AGE_SECONDS
+        if force or stale or version != snapshot.version:
+            self._snapshot = self.load(version)
+
+    def poll(self):
+        while True:
+            time.sleep(POLL_SECONDS)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Movie catalogue refresh failed, keeping the previous snapshot")
+
+    def names(self):
+        return self.snapshot().names
+
+    def lookup(self, name):
+        return self.snapshot().by_name.get(name)
+
+
+catalogue = MovieCatalogue()
@@ -0,0 +1,72 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Heavy third-party clients, imported and configured on first use rather than at
+# app import, so a worker can serve /tickets before Gemini, Tesseract or Razorpay
+# have ever been loaded.
+
+# FAKE_GATEWAYS=1 swaps all three for the offline fakes in utils/fake_gateways.py
+FAKE_GATEWAYS = os.getenv("FAKE_GATEWAYS", "").lower() in ('1', 'true', 'yes')
+
+_lock = threading.Lock()
+_clients = {}
+
+
+def lazy_client(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def make_gemini_model():
+    if FAKE_GATEWAYS:
+        from utils.fake_gateways import FakeGeminiModel
+        return FakeGeminiModel()
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel("gemini-1.5-flash")
+
+
+def make_ocr():
+    if FAKE_GATEWAYS:
+        from utils.fake_gateways import FakeOcr
+        return FakeOcr()
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_CMD", "/opt/homebrew/bin/tesseract")
+    return pytesseract
+
+
+# Razorpay keys only ever come from the environment
+def razorpay_keys():
+    key_id = os.getenv("RAZORPAY_KEY_ID")
+    secret = os.getenv("RAZORPAY_KEY_SECRET")
+    if not key_id or not secret:
+        raise RuntimeError("RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET must be set")
+    return key_id, secret
+
+
+def make_razorpay_client():
+    if FAKE_GATEWAYS:
+        from utils.fake_gateways import FakeRazorpayClient
+        return FakeRazorpayClient()
+    import razorpay
+    return razorpay.Client(auth=razorpay_keys())
+
+
+def get_gemini_model():
+    return lazy_client('gemini', make_gemini_model)
+
+
+def get_ocr():
+    return lazy_client('ocr', make_ocr)
+
+
+def get_razorpay_client():
+    return lazy_client('razorpay', make_razorpay_client)
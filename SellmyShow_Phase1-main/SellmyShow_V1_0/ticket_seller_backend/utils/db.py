@@ -0,0 +1,58 @@
+import os
+import threading
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# One client (and connection pool) per process, shared by every blueprint.
+#
+# The client is only built on the first query: a mongodb+srv:// URI does a DNS
+# lookup in the MongoClient constructor, and a client created before gunicorn
+# forks must not be used in the workers. Modules keep the usual
+# `ticket_collection = db["tickets"]` at import time; those are cheap proxies.
+
+# Shared by every thread/greenlet in the worker, see gunicorn.conf.py
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from utils.metrics import mongo_listeners
+                from utils.query_profiler import profiler_listeners
+                _client = MongoClient(
+                    os.getenv("MONGO_URI"),
+                    maxPoolSize=MAX_POOL_SIZE,
+                    # command timings and pool stats for /metrics, plus the sampled query profiler
+                    event_listeners=mongo_listeners() + profiler_listeners()
+                )
+    return _client
+
+
+def get_db():
+    return get_client()["ticket_db"]
+
+
+class LazyCollection:
+    def __init__(self, name):
+        self._name = name
+        self._collection = None
+
+    def __getattr__(self, attr):
+        if self._collection is None:
+            self._collection = get_db()[self._name]
+        return getattr(self._collection, attr)
+
+
+class LazyDatabase:
+    def __getitem__(self, name):
+        return LazyCollection(name)
+
+
+db = LazyDatabase()
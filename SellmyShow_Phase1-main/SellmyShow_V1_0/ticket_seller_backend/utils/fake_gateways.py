@@ -0,0 +1,69 @@
+import json
+import os
+import re
+import time
+import uuid
+
+# Offline stand-ins for Razorpay, Gemini and Tesseract, used when FAKE_GATEWAYS=1
+# (benchmarks, CI). They answer in the same shape as the real clients after a
+# fixed delay, so load tests still see the I/O wait the real calls would add.
+
+GEMINI_DELAY_MS = int(os.getenv("FAKE_GEMINI_MS", 800))
+OCR_DELAY_MS = int(os.getenv("FAKE_OCR_MS", 300))
+RAZORPAY_DELAY_MS = int(os.getenv("FAKE_RAZORPAY_MS", 200))
+
+OCR_TEXT = """PVR: Grand Galada, Pallavaram - Screen 3
+Chennai
+Sat, 18 Oct 2025 | 07:10 PM
+Seats: H11, H12
+2 Tickets  Rs. 380.00"""
+
+
+def pause(ms):
+    if ms:
+        time.sleep(ms / 1000)
+
+
+class FakeGeminiResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    # Picks the first movie from the list upload2 puts in the prompt
+    def generate_content(self, prompt):
+        pause(GEMINI_DELAY_MS)
+        match = re.search(r'list of movies: \["([^"]*)"', prompt)
+        return FakeGeminiResponse(json.dumps({
+            'event_name': match.group(1) if match else None,
+            'venue': 'PVR: Grand Galada, Pallavaram - Screen 3',
+            'datetime': '2025-10-18T19:10:00',
+            'original_price': 190,
+            'seat_numbers': ['H11', 'H12'],
+            'count': 2,
+            'city': 'Chennai'
+        }))
+
+
+class FakeOcr:
+    def image_to_string(self, image):
+        pause(OCR_DELAY_MS)
+        return OCR_TEXT
+
+
+class FakeRazorpayOrders:
+    def create(self, data):
+        pause(RAZORPAY_DELAY_MS)
+        return {
+            'id': 'order_' + uuid.uuid4().hex[:14],
+            'entity': 'order',
+            'amount': data['amount'],
+            'currency': data.get('currency', 'INR'),
+            'receipt': data.get('receipt'),
+            'status': 'created'
+        }
+
+
+class FakeRazorpayClient:
+    def __init__(self):
+        self.order = FakeRazorpayOrders()
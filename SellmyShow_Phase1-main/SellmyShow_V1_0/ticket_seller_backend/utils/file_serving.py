@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import posixpath
+import time
+from flask import current_app, request, jsonify, send_from_directory, redirect, Response
+from werkzeug.security import safe_join
+from utils.auth_utils import JWT_SECRET
+from utils.storage import storage_for, key_url, PUBLIC_PREFIX
+
+# Lifetime of the signed /uploads links handed out by /upload-link
+UPLOAD_LINK_SECONDS = int(os.getenv("UPLOAD_LINK_SECONDS", 300))
+
+# Upload serving modes (UPLOAD_SERVE_MODE):
+#   flask    - Python streams the file (default, fine for local development)
+#   sendfile - X-Sendfile header, for Apache mod_xsendfile / lighttpd
+#   accel    - X-Accel-Redirect header, for nginx. Needs an internal location, e.g.
+#
+#       location /protected-uploads/ {
+#           internal;
+#           alias /app/uploads/;
+#           add_header Cache-Control "private, max-age=86400, immutable";
+#       }
+#
+# In every mode Flask checks auth first and answers conditional requests itself,
+# so a repeat view costs a stat() and a 304 instead of a file transfer.
+# With the S3 storage backend the client is redirected to a short-lived signed URL
+# (legacy flat uploads are still served from local disk, see utils/storage.py).
+#
+# A plain link or <img> cannot send the bearer token, so a signed-in client asks
+# /upload-link for a URL carrying ?expires=&sig= (HMAC of key and expiry), which
+# /uploads accepts in place of the token until it expires.
+
+
+# Helper: Canonical storage key for a requested path, or None if it escapes its area.
+# "posters/../ab/cd/x.png" must not reach private uploads through the public route.
+def clean_key(filename, public):
+    key = posixpath.normpath(filename.replace('\\', '/'))
+    if key.startswith(('/', '.')):
+        return None
+    if public and not key.startswith(PUBLIC_PREFIX):
+        return None
+    return key
+
+
+def upload_signature(key, expires):
+    message = f'upload|{key}|{expires}'.encode('utf-8')
+    return hmac.new(JWT_SECRET.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def signed_upload_url(key):
+    expires = int(time.time()) + UPLOAD_LINK_SECONDS
+    return f'{key_url(key)}?expires={expires}&sig={upload_signature(key, expires)}'
+
+
+def has_valid_signature(filename, args):
+    key = clean_key(filename, public=False)
+    try:
+        expires = int(args.get('expires', ''))
+    except ValueError:
+        return False
+    if key is None or expires < time.time():
+        return False
+    return hmac.compare_digest(args.get('sig', ''), upload_signature(key, expires))
+
+
+def upload_response(filename, public=False):
+    filename = clean_key(filename, public)
+    if filename is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    storage = storage_for(filename)
+    if storage.name == 's3':
+        if not storage.exists(filename):
+            return jsonify({'error': 'File not found'}), 404
+        return redirect(storage.presigned_url(filename))
+
+    # Relative folders resolve against the app root, as send_from_directory does
+    folder = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({'error': 'File not found'}), 404
+
+    mode = current_app.config.get('UPLOAD_SERVE_MODE', 'flask')
+    max_age = current_app.config.get('UPLOAD_CACHE_SECONDS', 86400)
+
+    if mode == 'accel':
+        response = accel_response(path, filename, max_age)
+    else:
+        # send_file handles ETag, Last-Modified, Range and If-Range; with
+        # USE_X_SENDFILE set (sendfile mode) it emits X-Sendfile instead of the body
+        response = send_from_directory(folder, filename, conditional=True, etag=True, max_age=max_age)
+
+    # Blobs are written once under content-addressed names; only posters may be shared caches
+    response.cache_control.public = public
+    response.cache_control.private = not public
+    response.cache_control.immutable = True
+    return response
+
+
+def accel_response(path, filename, max_age):
+    stat = os.stat(path)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    response = Response(mimetype=mimetype)
+    # Files are never rewritten in place, so mtime + size is a strong validator
+    response.set_etag(f"{int(stat.st_mtime)}-{stat.st_size:x}")
+    response.last_modified = stat.st_mtime
+    response.cache_control.max_age = max_age
+    response.headers['Accept-Ranges'] = 'bytes'
+    response = response.make_conditional(request)
+
+    # nginx serves the body (and any Range) from the internal location
+    if response.status_code == 200:
+        prefix = current_app.config.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + filename
+    return response
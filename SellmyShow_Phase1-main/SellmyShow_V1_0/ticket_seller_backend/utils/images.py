@@ -0,0 +1,134 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from utils.storage import get_storage
+from utils.db import db
+
+logger = logging.getLogger(__name__)
+
+# Resized copies stored next to the original: "<hash>.<variant>.<format>".
+# Widths are upper bounds and smaller images are never upscaled, so a small
+# source yields fewer variants; the widths actually produced are recorded in
+# image_derivatives and only those go into srcset. Images with transparency get
+# a PNG fallback instead of JPEG so the alpha channel survives.
+#
+# Derivatives are made off the request thread, so URLs only exist once the files
+# do: derivative_urls() returns None until then, and the worker fills in
+# ticket_images on the tickets that point at the original when it finishes.
+VARIANTS = {'card': 400, 'detail': 800, 'full': 1600}
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+    'png': {'format': 'PNG', 'optimize': True},
+}
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+
+derivatives_collection = db["image_derivatives"]  # one manifest per original key
+ticket_collection = db["tickets"]
+
+# Pillow releases the GIL while encoding, so a couple of threads keep up with uploads
+executor = ThreadPoolExecutor(max_workers=int(os.getenv("IMAGE_WORKERS", 2)), thread_name_prefix='images')
+
+
+def is_image_key(key):
+    return '.' in key and key.rsplit('.', 1)[1].lower() in IMAGE_EXTENSIONS
+
+
+def derivative_key(key, variant, ext):
+    return f"{key.rsplit('.', 1)[0]}.{variant}.{ext}"
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+# Writes the derivatives and returns their manifest: {'widths': {variant: px}, 'fallback': 'jpg'|'png'}
+def generate_derivatives(key):
+    from PIL import Image, ImageOps  # imported here to keep app startup light
+    storage = get_storage()
+    original = storage.open(key)
+    try:
+        # S3 bodies aren't seekable; uploads are capped at 5MB so reading whole is fine
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(original.read())))
+    finally:
+        original.close()
+
+    fallback = 'png' if has_alpha(image) else 'jpg'
+    image = image.convert('RGBA' if fallback == 'png' else 'RGB')
+
+    widths = {}
+    for variant, width in sorted(VARIANTS.items(), key=lambda item: item[1]):
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        if widths and resized.width <= max(widths.values()):
+            break  # the source is smaller than this variant; it would only repeat the last one
+        widths[variant] = resized.width
+        for ext in ('webp', fallback):
+            target = derivative_key(key, variant, ext)
+            if storage.exists(target):
+                continue  # content addressed, so an existing derivative is already correct
+            buffer = io.BytesIO()
+            resized.save(buffer, **FORMATS[ext])
+            storage.save_bytes(target, buffer.getvalue())
+
+    manifest = {'widths': widths, 'fallback': fallback}
+    derivatives_collection.update_one({'_id': key}, {'$set': manifest}, upsert=True)
+    return manifest
+
+
+def run_derivatives(key):
+    try:
+        manifest = generate_derivatives(key)
+        # Tickets posted before the files existed were saved without ticket_images
+        ticket_collection.update_many(
+            {'ticket_url': get_storage().url(key)},
+            {'$set': {'ticket_images': derivative_images(key, manifest)}}
+        )
+    except Exception:
+        logger.exception("Derivative generation failed for %s", key)
+
+
+# Queue derivative generation off the request thread
+def schedule_derivatives(key):
+    if is_image_key(key):
+        executor.submit(run_derivatives, key)
+
+
+# URLs for <img srcset>: one URL per variant and format, plus ready-made srcset
+# strings listing only the widths that were produced. A variant the source was
+# too small for points at the largest one that exists.
+def derivative_images(key, manifest, base_url=''):
+    storage = get_storage()
+    widths = manifest['widths']
+    largest = max(widths, key=widths.get)
+    images = {'widths': widths, 'fallback': manifest['fallback']}
+    for ext in ('webp', manifest['fallback']):
+        urls = {
+            variant: base_url + storage.url(derivative_key(key, variant if variant in widths else largest, ext))
+            for variant in VARIANTS
+        }
+        images[ext] = urls
+        images[f"{ext}_srcset"] = ', '.join(f"{urls[variant]} {width}w" for variant, width in widths.items())
+    return images
+
+
+# Derivative URLs of an original, or None until they have been generated
+def derivative_urls(key, base_url=''):
+    if not key or not is_image_key(key):
+        return None
+    manifest = derivatives_collection.find_one({'_id': key})
+    if not manifest:
+        return None
+    return derivative_images(key, manifest, base_url)
+
+
+# Storage key behind an "/uploads/<key>" or "/posters/<key>" URL, or None for anything else
+def key_from_url(url):
+    if not isinstance(url, str):
+        return None
+    if url.startswith('/uploads/'):
+        return url[len('/uploads/'):]
+    if url.startswith('/posters/'):
+        return 'posters/' + url[len('/posters/'):]
+    return None
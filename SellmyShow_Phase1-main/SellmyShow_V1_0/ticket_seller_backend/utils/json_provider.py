@@ -0,0 +1,62 @@
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from bson import ObjectId, Decimal128
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # optional, much faster encoder/decoder
+except ImportError:
+    orjson = None
+
+
+def encode_default(o):
+    # Types Mongo documents carry that the JSON encoders don't know about
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, (ObjectId, uuid.UUID)):
+        return str(o)
+    if isinstance(o, Decimal128):
+        o = o.to_decimal()
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+# App-wide JSON provider: orjson when installed, stdlib json otherwise.
+# Set JSON_BACKEND=stdlib in the app config to force the fallback.
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(encode_default)
+    ensure_ascii = False
+    sort_keys = False
+    compact = True
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get('JSON_BACKEND', 'orjson')
+        self.use_orjson = orjson is not None and backend == 'orjson'
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson:
+            option = orjson.OPT_NON_STR_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=encode_default, option=option).decode('utf-8')
+            except TypeError:
+                pass  # e.g. ints wider than 64 bits, let the stdlib handle it
+
+        if not kwargs.get('indent'):
+            kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers see the usual error
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
@@ -0,0 +1,145 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import g, request, has_request_context
+
+# JSON logs, one object per line on stdout, written by a background thread.
+#
+# Request handlers only put records on a bounded queue (QueueHandler); a
+# QueueListener thread formats and writes them. If the queue is full the record
+# is dropped and counted instead of blocking the request. Every record logged
+# during a request carries its request_id (taken from X-Request-ID when the proxy
+# sets one), and the id is echoed back in the response headers.
+#
+#   LOG_LEVEL=INFO             root level (DEBUG shows form fields, OTPs in dev)
+#   LOG_SAMPLE_RATE=0.05       share of access lines kept for SAMPLED_ENDPOINTS
+#   LOG_SLOW_MS=1000           slower requests are always logged
+#   LOG_QUEUE_SIZE=10000
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.05))
+SLOW_MS = float(os.getenv("LOG_SLOW_MS", 1000))
+QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# High-volume reads whose successful, fast requests are only logged at SAMPLE_RATE
+SAMPLED_ENDPOINTS = set(filter(None, os.getenv(
+    "LOG_SAMPLED_ENDPOINTS",
+    "tickets.get_tickets,filter.get_active_filters,cinema.get_cinema_data,poster_file,metrics"
+).split(',')))
+
+access_logger = logging.getLogger('access')
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestIdFilter(logging.Filter):
+    # Runs in the thread that logged, before the record is queued
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def prepare(self, record):
+        # Like the stock prepare(), but keeps the traceback out of the message
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+_listener = None
+
+
+def configure_logging():
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    handler = DroppingQueueHandler(queue.Queue(QUEUE_SIZE))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # flush what is still queued
+
+
+def assign_request_id():
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.log_started = time.perf_counter()
+
+
+def log_request(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    started = g.pop('log_started', None)
+    if started is None:
+        return response
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    sampled = request.endpoint in SAMPLED_ENDPOINTS and response.status_code < 500 and duration_ms < SLOW_MS
+    if sampled and random.random() >= SAMPLE_RATE:
+        return response
+    level = logging.ERROR if response.status_code >= 500 else logging.INFO
+    access_logger.log(level, "request", extra={
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'duration_ms': round(duration_ms, 2),
+        'sampled': sampled
+    })
+    return response
+
+
+def init_logging(app):
+    configure_logging()
+    app.before_request(assign_request_id)
+    app.after_request(log_request)
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request, jsonify, Response
+from pymongo import monitoring
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+
+# Prometheus metrics for the API.
+#
+# Under gunicorn every worker is its own process, so set PROMETHEUS_MULTIPROC_DIR
+# to an empty directory: each worker then writes its samples there and /metrics
+# (served by whichever worker gets the scrape) adds them all up. gunicorn.conf.py
+# cleans the directory on start and marks dead workers on child_exit.
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Optional bearer token for /metrics when it is reachable from outside
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['blueprint', 'endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_seconds', 'MongoDB time spent inside one request',
+    ['blueprint', 'endpoint'], buckets=DB_BUCKETS
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    'mongo_command_duration_seconds', 'MongoDB command round trip',
+    ['command', 'collection', 'outcome'], buckets=DB_BUCKETS
+)
+EXTERNAL_CALL_SECONDS = Histogram(
+    'external_call_duration_seconds', 'Calls to Razorpay, Gemini and Tesseract',
+    ['service', 'outcome'], buckets=LATENCY_BUCKETS
+)
+POOL_CONNECTIONS = Gauge(
+    'mongo_pool_connections', 'Open connections in the MongoDB pool', ['address'], multiprocess_mode='livesum'
+)
+POOL_CHECKED_OUT = Gauge(
+    'mongo_pool_checked_out', 'Pool connections currently in use', ['address'], multiprocess_mode='livesum'
+)
+POOL_CHECKOUT_FAILURES = Counter(
+    'mongo_pool_checkout_failures', 'Failed pool checkouts (timeouts, closed pool)', ['address', 'reason']
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests', 'In-process cache lookups', ['cache', 'result']
+)
+RATE_LIMITED = Counter(
+    'rate_limited_requests', 'Requests rejected with 429', ['limit']
+)
+
+# DB time and command count of the request running on this thread (or greenlet)
+_request_db = threading.local()
+
+
+def request_db_stats():
+    return getattr(_request_db, 'seconds', 0.0), getattr(_request_db, 'commands', 0)
+
+
+def reset_request_db_stats():
+    _request_db.seconds = 0.0
+    _request_db.commands = 0
+
+
+# Credit DB work done on a helper thread (e.g. /home sections) to the request it ran for
+def add_request_db_stats(seconds, commands):
+    _request_db.seconds = getattr(_request_db, 'seconds', 0.0) + seconds
+    _request_db.commands = getattr(_request_db, 'commands', 0) + commands
+
+
+class CommandTimer(monitoring.CommandListener):
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        # The collection is only in the command document, which later events do not carry
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ''
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def finish(self, event, outcome):
+        collection = self._collections.pop((event.connection_id, event.request_id), '')
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMAND_SECONDS.labels(event.command_name, collection, outcome).observe(seconds)
+        _request_db.seconds = getattr(_request_db, 'seconds', 0.0) + seconds
+        _request_db.commands = getattr(_request_db, 'commands', 0) + 1
+
+    def succeeded(self, event):
+        self.finish(event, 'ok')
+
+    def failed(self, event):
+        self.finish(event, 'error')
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    @staticmethod
+    def address(event):
+        return '%s:%s' % event.address
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS.labels(self.address(event)).inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS.labels(self.address(event)).dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        POOL_CHECKOUT_FAILURES.labels(self.address(event), str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        POOL_CHECKED_OUT.labels(self.address(event)).inc()
+
+    def connection_checked_in(self, event):
+        POOL_CHECKED_OUT.labels(self.address(event)).dec()
+
+
+# Passed to the shared MongoClient in utils/db.py
+def mongo_listeners():
+    return [CommandTimer(), PoolStats()]
+
+
+@contextmanager
+def external_call(service):
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        EXTERNAL_CALL_SECONDS.labels(service, outcome).observe(time.perf_counter() - started)
+
+
+def start_timer():
+    g.metrics_started = time.perf_counter()
+    reset_request_db_stats()
+
+
+def record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None or request.endpoint == 'metrics':
+        return response
+    blueprint = request.blueprint or 'app'
+    endpoint = request.endpoint or 'unmatched'  # 404s share one series
+    REQUEST_SECONDS.labels(blueprint, endpoint, request.method, response.status_code).observe(time.perf_counter() - started)
+    REQUEST_DB_SECONDS.labels(blueprint, endpoint).observe(request_db_stats()[0])
+    return response
+
+
+def metrics():
+    if METRICS_TOKEN and request.headers.get('Authorization', '') != f'Bearer {METRICS_TOKEN}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    app.before_request(start_timer)
+    app.after_request(record_request)
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -1,41 +1,190 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from pymongo import MongoClient
+# Movie catalogue ingestion: scrape "now showing" pages and upsert movie_names.
+#
+#   python -m utils.movie_poster --cities coimbatore,chennai
+#   python -m utils.movie_poster --cities coimbatore --fixtures tests/fixtures/bms
+#
+# Cities are fetched concurrently in headless Chrome (or read from saved
+# <fixtures>/<city>.html files, no network needed), movies are merged by
+# normalised name and written with a single bulk_write. Every run records
+# inserted/updated/unchanged counts in catalogue_runs.
+
+import argparse
 import os
-import time
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from html.parser import HTMLParser
+from pymongo import UpdateOne
 from dotenv import load_dotenv
+from utils.catalogue import bump_catalogue_version
+from utils.db import db
 load_dotenv()
 
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["ticket_db"]
 collection = db["movie_names"]
+runs_collection = db["catalogue_runs"]
+
+CITY_URL = "https://in.bookmyshow.com/explore/movies-{city}"
+PAGE_TIMEOUT = 20
+NAME_KEY_INDEX = 'name_key_1'
+
+
+def normalise_name(name):
+    name = unicodedata.normalize('NFKC', name).casefold()
+    name = re.sub(r'[^\w\s]', ' ', name)
+    return ' '.join(name.split())
+
+
+class PosterParser(HTMLParser):
+    # Collects (alt, src) of portrait poster images, like the old XPath //img[@alt]
+    def __init__(self):
+        super().__init__()
+        self.movies = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'img':
+            return
+        attrs = dict(attrs)
+        alt = (attrs.get('alt') or '').strip()
+        src = attrs.get('src') or attrs.get('data-src') or ''
+        if alt and src and 'portrait' in src:
+            self.movies.append({'name': alt, 'poster_url': src})
+
+
+def parse_movies(html):
+    parser = PosterParser()
+    parser.feed(html)
+    return parser.movies
+
+
+def fetch_city_html(city):
+    # Selenium is only needed for live runs, not for fixtures
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    try:
+        driver.get(CITY_URL.format(city=city))
+        # Wait for posters to render instead of sleeping a fixed time
+        WebDriverWait(driver, PAGE_TIMEOUT).until(
+            EC.presence_of_element_located((By.XPATH, "//img[@alt and contains(@src, 'portrait')]"))
+        )
+        return driver.page_source
+    finally:
+        driver.quit()
+
+
+def load_city(city, fixtures_dir=None):
+    if fixtures_dir:
+        with open(os.path.join(fixtures_dir, f"{city}.html"), encoding='utf-8') as f:
+            return parse_movies(f.read())
+    return parse_movies(fetch_city_html(city))
+
+
+# Merge per-city results into one entry per normalised name
+def merge_movies(results):
+    merged = {}
+    for city, movies in results.items():
+        for movie in movies:
+            key = normalise_name(movie['name'])
+            if not key:
+                continue
+            entry = merged.setdefault(key, {'name': movie['name'], 'poster_url': movie['poster_url'], 'cities': set()})
+            entry['cities'].add(city)
+    return merged
+
+
+# One-off migration: older runs inserted blindly, so give those docs a name_key and
+# drop duplicates. The unique index it ends with marks it done; every later run
+# costs one index listing (all writers upsert by name_key from then on).
+def backfill_name_keys():
+    if NAME_KEY_INDEX in collection.index_information():
+        return 0
+    seen = set()
+    duplicates = []
+    for doc in collection.find({}, {'name': 1, 'name_key': 1}).sort('_id', 1):
+        key = doc.get('name_key') or normalise_name(doc.get('name', ''))
+        if key in seen:
+            duplicates.append(doc['_id'])
+            continue
+        seen.add(key)
+        if doc.get('name_key') != key:
+            collection.update_one({'_id': doc['_id']}, {'$set': {'name_key': key}})
+    if duplicates:
+        collection.delete_many({'_id': {'$in': duplicates}})
+    collection.create_index('name_key', unique=True, name=NAME_KEY_INDEX)
+    return len(duplicates)
+
+
+def ingest(cities, fixtures_dir=None, workers=4):
+    started_at = datetime.utcnow()
+    duplicates_removed = backfill_name_keys()
+
+    results, failed = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(cities)))) as pool:
+        futures = {city: pool.submit(load_city, city, fixtures_dir) for city in cities}
+        for city, future in futures.items():
+            try:
+                results[city] = future.result()
+            except Exception as e:
+                failed[city] = str(e)
+
+    merged = merge_movies(results)
+    now = datetime.utcnow().isoformat()
+    # poster_url is only set on insert: once mirrored it points at our copy, and a
+    # changed poster_source_url is what tells the poster mirror to fetch again
+    operations = [
+        UpdateOne(
+            {'name_key': key},
+            {
+                '$set': {'poster_source_url': movie['poster_url']},
+                '$addToSet': {'cities': {'$each': sorted(movie['cities'])}},
+                '$setOnInsert': {'name': movie['name'], 'poster_url': movie['poster_url'], 'first_seen_at': now}
+            },
+            upsert=True
+        )
+        for key, movie in merged.items()
+    ]
+
+    inserted = updated = 0
+    if operations:
+        result = collection.bulk_write(operations, ordered=False)
+        inserted = result.upserted_count
+        updated = result.modified_count
+    if inserted or updated or duplicates_removed:
+        bump_catalogue_version()  # running workers pick up the new list
+
+    stats = {
+        'started_at': started_at,
+        'finished_at': datetime.utcnow(),
+        'cities': {city: len(movies) for city, movies in results.items()},
+        'failed_cities': failed,
+        'seen': len(merged),
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': len(merged) - inserted - updated,
+        'duplicates_removed': duplicates_removed,
+        'source': 'fixtures' if fixtures_dir else 'live'
+    }
+    runs_collection.insert_one(dict(stats))
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingest the movie catalogue into movie_names')
+    parser.add_argument('--cities', default='coimbatore', help='comma-separated city slugs')
+    parser.add_argument('--fixtures', help='read <city>.html from this directory instead of the network')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
 
-# Setup Chrome
-options = webdriver.ChromeOptions()
-# options.add_argument("--headless")
-
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-driver.get("https://in.bookmyshow.com/explore/movies-coimbatore")
-
-time.sleep(5)
-
-# Extract image info
-movies = []
-images = driver.find_elements(By.XPATH, "//img[@alt]")
-
-for img in images:
-    alt = img.get_attribute("alt")
-    src = img.get_attribute("src")
-    if alt and src and "portrait" in src:
-        print(f"Movie: {alt}")
-        print(f"Poster: {src}")
-        print("-" * 50)
-        movies.append({"name": alt, "poster_url": src})
-driver.quit()
-
-# Insert into MongoDB if not already present
-for movie in movies:
-    # if not collection.find_one({"name": movie["name"]}):
-        collection.insert_one(movie)
+    cities = [c.strip() for c in args.cities.split(',') if c.strip()]
+    print(ingest(cities, fixtures_dir=args.fixtures, workers=args.workers))
@@ -0,0 +1,145 @@
+# Mirror movie posters from the third-party CDN into our own blob storage.
+#
+# Each poster is downloaded once, stored content addressed under "posters/",
+# resized into card/detail/full WebP and JPEG copies, and movie_names.poster_url
+# (plus the poster_url of existing tickets) is pointed at the local card image.
+# Later runs send If-None-Match / If-Modified-Since, so unchanged posters cost a
+# 304, and a new poster_source_url from the scraper triggers a fresh download.
+#
+#   python -m utils.poster_mirror            # mirror new and changed posters
+#   python -m utils.poster_mirror --force    # re-download everything
+
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+from dotenv import load_dotenv
+from utils.storage import get_storage, PUBLIC_PREFIX
+from utils.images import generate_derivatives, derivative_images
+from utils.catalogue import bump_catalogue_version
+from utils.db import db
+from utils.response_cache import invalidate_listings
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+movie_names_collection = db["movie_names"]
+ticket_collection = db["tickets"]
+
+# Prepended to mirrored URLs when the API and the frontend live on different hosts
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "").rstrip('/')
+DOWNLOAD_TIMEOUT = 15
+MAX_POSTER_BYTES = 5 * 1024 * 1024
+CONTENT_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp'}
+
+
+def is_mirrored(url):
+    return isinstance(url, str) and '/posters/' in url and (not MEDIA_BASE_URL or url.startswith(MEDIA_BASE_URL))
+
+
+def source_url(movie):
+    if movie.get('poster_source_url'):
+        return movie['poster_source_url']
+    url = movie.get('poster_url')
+    return None if is_mirrored(url) else url
+
+
+class LimitedStream:
+    # Stops reading a response body once it passes MAX_POSTER_BYTES
+    def __init__(self, raw):
+        self.raw = raw
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        chunk = self.raw.read(size)
+        self.read_bytes += len(chunk)
+        if self.read_bytes > MAX_POSTER_BYTES:
+            raise ValueError("Poster larger than %d bytes" % MAX_POSTER_BYTES)
+        return chunk
+
+
+def mirror_poster(movie, force=False, session=requests):
+    source = source_url(movie)
+    if not source:
+        return 'skipped'
+
+    headers = {}
+    same_source = movie.get('poster_mirrored_from') == source
+    if same_source and not force:
+        if movie.get('poster_etag'):
+            headers['If-None-Match'] = movie['poster_etag']
+        if movie.get('poster_last_modified'):
+            headers['If-Modified-Since'] = movie['poster_last_modified']
+
+    now = datetime.utcnow().isoformat()
+    with session.get(source, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True) as response:
+        if response.status_code == 304:
+            movie_names_collection.update_one({'_id': movie['_id']}, {'$set': {'poster_checked_at': now}})
+            return 'unchanged'
+        response.raise_for_status()
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        extension = CONTENT_TYPES.get(content_type, 'jpg')
+        response.raw.decode_content = True
+        storage = get_storage()
+        key = storage.save(LimitedStream(response.raw), extension, prefix=PUBLIC_PREFIX)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+    images = derivative_images(key, generate_derivatives(key), MEDIA_BASE_URL)
+    local_url = images['webp']['card']
+
+    movie_names_collection.update_one(
+        {'_id': movie['_id']},
+        {'$set': {
+            'poster_url': local_url,
+            'poster_images': images,
+            'poster_key': key,
+            'poster_source_url': source,
+            'poster_mirrored_from': source,
+            'poster_etag': etag,
+            'poster_last_modified': last_modified,
+            'poster_mirrored_at': now,
+            'poster_checked_at': now
+        }}
+    )
+    # Existing listings copied the old URL when they were posted
+    ticket_collection.update_many(
+        {'event_name': movie['name'], 'poster_url': {'$ne': local_url}},
+        {'$set': {'poster_url': local_url, 'poster_images': images}}
+    )
+    return 'mirrored' if movie.get('poster_key') != key else 'unchanged'
+
+
+def mirror_all(force=False, workers=4):
+    movies = list(movie_names_collection.find({}, {
+        'name': 1, 'poster_url': 1, 'poster_source_url': 1, 'poster_mirrored_from': 1,
+        'poster_etag': 1, 'poster_last_modified': 1, 'poster_key': 1
+    }))
+
+    def run(movie):
+        try:
+            return mirror_poster(movie, force=force)
+        except Exception:
+            logger.exception("Poster mirror failed for %s", movie.get('name'))
+            return 'failed'
+
+    stats = {'mirrored': 0, 'unchanged': 0, 'skipped': 0, 'failed': 0}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for outcome in pool.map(run, movies):
+            stats[outcome] += 1
+    if stats['mirrored']:
+        bump_catalogue_version()  # new poster URLs for upload2
+        invalidate_listings()  # and for cached /tickets responses
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mirror movie posters into local storage')
+    parser.add_argument('--force', action='store_true', help='re-download posters even if unchanged')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    print(mirror_all(force=args.force, workers=args.workers))
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from flask import request
+from pymongo import monitoring
+
+# Per-request MongoDB profiler.
+#
+# For a sampled request every command is recorded with its query shape (values
+# replaced by "?") and duration. When the request is over it is logged if it ran
+# too many commands, spent too long in Mongo, ran one slow command, or repeated
+# the same query shape over and over (the N+1 pattern). Query shapes whose
+# filter fields no index starts with are logged once per worker.
+#
+#   QUERY_PROFILE_SAMPLE_RATE=1      # development: every request
+#   QUERY_PROFILE_SAMPLE_RATE=0.01   # production: 1% of requests
+#
+# At 0 (the default) no listener or request hook is installed at all.
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = float(os.getenv("QUERY_PROFILE_SAMPLE_RATE", 0))
+MAX_COMMANDS = int(os.getenv("QUERY_PROFILE_MAX_COMMANDS", 5))
+SLOW_REQUEST_MS = float(os.getenv("QUERY_PROFILE_SLOW_MS", 100))
+SLOW_COMMAND_MS = float(os.getenv("QUERY_PROFILE_SLOW_COMMAND_MS", 50))
+REPEAT_THRESHOLD = int(os.getenv("QUERY_PROFILE_REPEAT", 3))
+INDEX_CACHE_SECONDS = 300
+
+# Where each command keeps its filter
+FILTER_FIELDS = {'find': 'filter', 'count': 'query', 'distinct': 'query', 'findAndModify': 'query'}
+
+_profile = threading.local()
+_index_cache = {}
+_reported_shapes = set()
+
+
+def query_shape(value):
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        return [query_shape(v) for v in value]
+    return '?'
+
+
+def command_filter(name, command):
+    if name in FILTER_FIELDS:
+        return command.get(FILTER_FIELDS[name]) or {}
+    if name == 'aggregate':
+        pipeline = command.get('pipeline') or [{}]
+        return pipeline[0].get('$match')
+    if name in ('update', 'delete'):
+        statements = command.get('updates' if name == 'update' else 'deletes') or [{}]
+        return statements[0].get('q') or {}
+    return None  # inserts, getMore, admin commands
+
+
+def filter_fields(query):
+    fields = set()
+    for key, value in query.items():
+        if key in ('$and', '$or', '$nor') and isinstance(value, list):
+            for clause in value:
+                fields |= filter_fields(clause)
+        elif not key.startswith('$'):
+            fields.add(key)
+    return fields
+
+
+class QueryRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        if getattr(_profile, 'commands', None) is None:
+            return
+        collection = event.command.get(event.command_name)
+        query = command_filter(event.command_name, event.command)
+        self._pending[(event.connection_id, event.request_id)] = (
+            event.command_name,
+            collection if isinstance(collection, str) else '',
+            query
+        )
+
+    def finish(self, event, ok):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        commands = getattr(_profile, 'commands', None)
+        if pending is None or commands is None:
+            return
+        name, collection, query = pending
+        commands.append({
+            'command': name,
+            'collection': collection,
+            'filter': query,
+            'shape': json.dumps(query_shape(query), sort_keys=True) if query is not None else None,
+            'ms': event.duration_micros / 1000,
+            'ok': ok
+        })
+
+    def succeeded(self, event):
+        self.finish(event, True)
+
+    def failed(self, event):
+        self.finish(event, False)
+
+
+# Passed to the shared MongoClient in utils/db.py
+def profiler_listeners():
+    return [QueryRecorder()] if SAMPLE_RATE > 0 else []
+
+
+# Leading key of every index on the collection, cached per worker
+def index_prefixes(collection):
+    cached = _index_cache.get(collection)
+    if cached and time.monotonic() - cached[0] < INDEX_CACHE_SECONDS:
+        return cached[1]
+    from utils.db import get_db
+    info = get_db()[collection].index_information()
+    prefixes = {spec['key'][0][0] for spec in info.values()}
+    _index_cache[collection] = (time.monotonic(), prefixes)
+    return prefixes
+
+
+def unindexed_shapes(commands):
+    found = []
+    for c in commands:
+        if not c['collection'] or not c['filter']:
+            continue
+        key = (c['collection'], c['shape'])
+        if key in _reported_shapes:
+            continue
+        fields = filter_fields(c['filter'])
+        if fields and not fields & index_prefixes(c['collection']):
+            _reported_shapes.add(key)
+            found.append({'collection': c['collection'], 'command': c['command'], 'shape': c['shape']})
+    return found
+
+
+def start_profile():
+    _profile.commands = [] if random.random() < SAMPLE_RATE else None
+
+
+def finish_profile(response):
+    commands = getattr(_profile, 'commands', None)
+    _profile.commands = None  # index lookups below are not part of the request
+    if not commands:
+        return response
+
+    total_ms = sum(c['ms'] for c in commands)
+    slowest = max(commands, key=lambda c: c['ms'])
+    repeats = {}
+    for c in commands:
+        if c['shape'] is not None:
+            key = (c['command'], c['collection'], c['shape'])
+            repeats[key] = repeats.get(key, 0) + 1
+    repeated = [
+        {'command': k[0], 'collection': k[1], 'shape': k[2], 'times': n}
+        for k, n in repeats.items() if n >= REPEAT_THRESHOLD
+    ]
+
+    problems = []
+    if len(commands) > MAX_COMMANDS:
+        problems.append('too_many_commands')
+    if total_ms > SLOW_REQUEST_MS:
+        problems.append('slow_db_time')
+    if slowest['ms'] > SLOW_COMMAND_MS:
+        problems.append('slow_command')
+    if repeated:
+        problems.append('repeated_query')
+    if problems:
+        logger.warning("Mongo profile %s %s: %s", request.method, request.endpoint, json.dumps({
+            'problems': problems,
+            'commands': len(commands),
+            'db_ms': round(total_ms, 2),
+            'slowest': {k: slowest[k] for k in ('command', 'collection', 'shape', 'ms')},
+            'repeated': repeated,
+            'sequence': [f"{c['command']} {c['collection']}" for c in commands]
+        }))
+
+    try:
+        for shape in unindexed_shapes(commands):
+            logger.warning("Query without index support on %s: %s", request.endpoint, json.dumps(shape))
+    except Exception:
+        logger.exception("Index coverage check failed")
+    return response
+
+
+def init_query_profiler(app):
+    if SAMPLE_RATE <= 0:
+        return
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
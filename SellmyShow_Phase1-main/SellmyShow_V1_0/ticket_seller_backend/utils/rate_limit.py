@@ -0,0 +1,196 @@
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from flask import request, jsonify
+from pymongo import ReturnDocument
+from utils.auth_utils import get_optional_user_id
+from utils.metrics import RATE_LIMITED
+
+# Sliding-window rate limits for the public endpoints.
+#
+# Each limit keeps a counter for the current and the previous fixed window and
+# weights the previous one by how much of it still overlaps the sliding window,
+# so a burst at a window edge cannot get through twice. The check runs before
+# the view (and before token_required), so a rejected request costs one counter
+# update and no MongoDB query or bcrypt hash.
+#
+#   RATE_LIMIT_BACKEND=memory   per worker, the default for local runs and tests
+#   RATE_LIMIT_BACKEND=mongo    shared by all workers, rate_limits collection with a TTL index
+#   RATE_LIMIT_BACKEND=redis    shared, needs the redis package and REDIS_URL
+#
+# With memory every gunicorn worker counts on its own, so N workers allow N
+# times the limit; production must use a shared backend (the Dockerfile sets
+# mongo, and gunicorn.conf.py warns about memory with more than one worker).
+# Per-IP limits also need PROXY_COUNT behind nginx (app.py), otherwise every
+# client shares the proxy's address.
+#
+# Limits are "count/period" strings and can be overridden per name, e.g.
+# RATE_LIMIT_BROWSE=300/minute. RATE_LIMIT_ENABLED=0 turns every limit off.
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ('0', 'false', 'no')
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(text):
+    count, _, period = text.partition('/')
+    period = period.strip()
+    seconds = int(period) if period.isdigit() else PERIODS[period.rstrip('s')]
+    return int(count), seconds
+
+
+class MemoryBackend:
+    name = 'memory'
+
+    def __init__(self, max_keys=100000):
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def hit(self, key, window, index):
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None or entry[0] < index - 1:
+                entry = [index, 0, 0]
+            elif entry[0] == index - 1:
+                entry = [index, 0, entry[1]]
+            entry[1] += 1
+            self._windows[key] = entry
+            if len(self._windows) > self._max_keys:
+                self.prune(index)
+            return entry[2], entry[1]
+
+    def prune(self, index):
+        for key in [k for k, e in self._windows.items() if e[0] < index - 1]:
+            del self._windows[key]
+
+
+# One document per key, {'counts': {'<window index>': n}}: a single
+# find_one_and_update bumps the current window, drops the one before the
+# previous and returns both counts the check needs
+class MongoBackend:
+    name = 'mongo'
+
+    def __init__(self):
+        from utils.db import db
+        self.collection = db["rate_limits"]
+        self._indexed = False
+
+    def hit(self, key, window, index):
+        if not self._indexed:
+            self.collection.create_index('expires_at', expireAfterSeconds=0)
+            self._indexed = True
+        doc = self.collection.find_one_and_update(
+            {'_id': key},
+            {
+                '$inc': {f'counts.{index}': 1},
+                '$unset': {f'counts.{index - 2}': ''},
+                '$set': {'expires_at': datetime.utcfromtimestamp((index + 2) * window)}
+            },
+            projection={f'counts.{index}': 1, f'counts.{index - 1}': 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        counts = doc.get('counts', {})
+        return counts.get(str(index - 1), 0), counts[str(index)]
+
+
+class RedisBackend:
+    name = 'redis'
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def hit(self, key, window, index):
+        current_key, previous_key = f'rl:{key}:{index}', f'rl:{key}:{index - 1}'
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2)
+        pipe.get(previous_key)
+        current, _, previous = pipe.execute()
+        return int(previous or 0), int(current)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                kind = os.getenv("RATE_LIMIT_BACKEND", "memory")
+                if kind == 'mongo':
+                    _backend = MongoBackend()
+                elif kind == 'redis':
+                    _backend = RedisBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+                else:
+                    _backend = MemoryBackend()
+    return _backend
+
+
+# Who a limit counts against
+def client_ip():
+    return request.remote_addr or 'unknown'  # the real client once ProxyFix is on, see app.py
+
+
+def user_or_ip():
+    user_id = get_optional_user_id()
+    return f'user:{user_id}' if user_id else f'ip:{client_ip()}'
+
+
+def json_field(name):
+    def key():
+        data = request.get_json(silent=True) or {}
+        value = data.get(name)
+        return f'{name}:{value}' if value else None
+    return key
+
+
+KEY_FUNCS = {'ip': lambda: f'ip:{client_ip()}', 'user': user_or_ip}
+
+
+def check(name, limit, window, identity):
+    now = time.time()
+    index = int(now // window)
+    try:
+        previous, current = get_backend().hit(f'{name}:{identity}', window, index)
+    except Exception:
+        logger.warning("Rate limit backend failed, letting the request through", exc_info=True)
+        return None
+    elapsed = now - index * window
+    if previous * (1 - elapsed / window) + current <= limit:
+        return None
+    if current > limit:
+        return math.ceil(window - elapsed)
+    # Seconds until enough of the previous window has slid out
+    needed = 1 - (limit - current) / previous
+    return max(1, math.ceil(needed * window - elapsed))
+
+
+# Put directly under @bp.route so it runs before token_required and the view
+def rate_limit(name, default, by='ip'):
+    limit, window = parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+    key_func = KEY_FUNCS[by] if isinstance(by, str) else by
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if ENABLED:
+                identity = key_func()
+                retry_after = check(name, limit, window, identity) if identity else None
+                if retry_after is not None:
+                    RATE_LIMITED.labels(name).inc()
+                    response = jsonify({'error': 'Too many requests, please try again later'})
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response, 429
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
@@ -0,0 +1,154 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from flask import g, request
+
+try:
+    from pyinstrument import Profiler  # optional sampling profiler with flamegraph output
+except ImportError:
+    Profiler = None
+
+# Opt-in CPU and memory profile of single requests.
+#
+# A request is profiled when it sends `X-Profile: <PROFILE_TOKEN>`, or at random
+# with probability PROFILE_SAMPLE_RATE. The view runs under pyinstrument (a
+# sampling profiler; cProfile when it is not installed) with tracemalloc on, and
+# the reports land in PROFILE_DIR:
+#
+#   <stamp>-<endpoint>.html     pyinstrument timeline/flamegraph (or .pstats + .txt with cProfile)
+#   <stamp>-<endpoint>.alloc.txt  top allocations made during the request
+#
+# The report name comes back in the X-Profile-Report header. With neither a
+# token nor a sample rate configured, init_request_profiler() installs nothing.
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiles'))
+MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", 200))
+TOP_ALLOCATIONS = 30
+
+# tracemalloc is process wide, so only one request per worker is profiled at a time
+_busy = threading.Lock()
+
+
+def wants_profile():
+    header = request.headers.get('X-Profile')
+    if header and PROFILE_TOKEN and hmac.compare_digest(header, PROFILE_TOKEN):
+        return True
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+def start_profile():
+    if not wants_profile() or not _busy.acquire(blocking=False):
+        return
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(10)
+    if Profiler is not None:
+        profiler = Profiler(interval=0.001, async_mode='disabled')
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    g.request_profile = {
+        'profiler': profiler,
+        'started_tracing': started_tracing,
+        'snapshot': tracemalloc.take_snapshot(),
+        'started': time.perf_counter()
+    }
+
+
+def report_name():
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S.%f')
+    endpoint = (request.endpoint or 'unmatched').replace('.', '_')
+    return f"{stamp}-{endpoint}"
+
+
+def write_cpu_report(profiler, base, header):
+    if Profiler is not None:
+        profiler.stop()
+        with open(base + '.html', 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+        return base + '.html'
+    profiler.disable()
+    profiler.dump_stats(base + '.pstats')  # open with snakeviz or `python -m pstats`
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(40)
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(header + text.getvalue())
+    return base + '.txt'
+
+
+def write_alloc_report(before, after, base, header):
+    stats = after.compare_to(before, 'lineno')
+    with open(base + '.alloc.txt', 'w', encoding='utf-8') as f:
+        f.write(header)
+        f.write(f"net allocated: {sum(s.size_diff for s in stats) / 1024:.1f} KiB\n\n")
+        for stat in stats[:TOP_ALLOCATIONS]:
+            f.write(f"{stat}\n")
+
+
+# Keep only the newest MAX_REPORTS files
+def prune_reports():
+    names = sorted(os.listdir(PROFILE_DIR))
+    for name in names[:max(0, len(names) - MAX_REPORTS)]:
+        os.remove(os.path.join(PROFILE_DIR, name))
+
+
+def finish_profile(response):
+    profile = g.pop('request_profile', None)
+    if profile is None:
+        return response
+    try:
+        duration_ms = (time.perf_counter() - profile['started']) * 1000
+        snapshot = tracemalloc.take_snapshot()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, report_name())
+        header = f"{request.method} {request.full_path} -> {response.status_code} in {duration_ms:.1f} ms\n\n"
+        cpu_report = write_cpu_report(profile['profiler'], base, header)
+        write_alloc_report(profile['snapshot'], snapshot, base, header)
+        prune_reports()
+        response.headers['X-Profile-Report'] = os.path.basename(cpu_report)
+        logger.info("Request profiled", extra={'report': cpu_report, 'duration_ms': round(duration_ms, 2)})
+    except Exception:
+        logger.exception("Writing the request profile failed")
+    finally:
+        release(profile)
+    return response
+
+
+def release(profile):
+    if profile['started_tracing']:
+        tracemalloc.stop()
+    _busy.release()
+
+
+# The view raised before after_request could run: stop profiling, skip the report
+def abandon_profile(exc):
+    profile = g.pop('request_profile', None)
+    if profile is None:
+        return
+    profiler = profile['profiler']
+    if Profiler is not None:
+        profiler.stop()
+    else:
+        profiler.disable()
+    release(profile)
+
+
+def init_request_profiler(app):
+    if not PROFILE_TOKEN and SAMPLE_RATE <= 0:
+        return
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.teardown_request(abandon_profile)
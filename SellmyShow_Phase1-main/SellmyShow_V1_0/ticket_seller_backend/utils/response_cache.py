@@ -0,0 +1,171 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from utils.db import db
+from utils.metrics import CACHE_REQUESTS
+
+# In-process cache of serialised GET /tickets responses.
+#
+# Entries are fresh for TICKETS_CACHE_TTL seconds. For TICKETS_CACHE_STALE more
+# seconds a stale entry is still served while one background thread rebuilds it
+# (stale-while-revalidate). On a miss only one request per key queries MongoDB;
+# concurrent requests for the same key wait for its result (single-flight).
+#
+# Any change to a listing calls invalidate_listings(): this worker drops its
+# entries at once, and the shared version in cache_meta is bumped so the other
+# workers drop theirs on their next poll (TICKETS_CACHE_POLL_SECONDS), the same
+# way the movie catalogue is kept in step.
+
+logger = logging.getLogger(__name__)
+
+meta_collection = db["cache_meta"]
+
+TTL_SECONDS = float(os.getenv("TICKETS_CACHE_TTL", 10))
+STALE_SECONDS = float(os.getenv("TICKETS_CACHE_STALE", 30))
+POLL_SECONDS = float(os.getenv("TICKETS_CACHE_POLL_SECONDS", 2))
+MAX_ENTRIES = int(os.getenv("TICKETS_CACHE_MAX_ENTRIES", 500))
+WAIT_SECONDS = 10  # how long a follower waits for the request filling the entry
+
+
+class CacheEntry:
+    __slots__ = ('generation', 'created', 'body', 'encoded')
+
+    def __init__(self, generation, body):
+        self.generation = generation
+        self.created = time.monotonic()
+        self.body = body
+        self.encoded = {}  # compressed copies, filled on first use
+
+
+class ResponseCache:
+    def __init__(self, name, version_id, ttl=TTL_SECONDS, stale=STALE_SECONDS, max_entries=MAX_ENTRIES):
+        self.name = name
+        self.version_id = version_id
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._watching = False
+
+    # Drop every entry (entries built from an older generation are never stored)
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def get(self, key, compute):
+        self.watch()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None and entry.generation == self.generation:
+            age = time.monotonic() - entry.created
+            if age < self.ttl:
+                CACHE_REQUESTS.labels(self.name, 'hit').inc()
+                return entry, 'hit'
+            if age < self.ttl + self.stale:
+                CACHE_REQUESTS.labels(self.name, 'stale').inc()
+                self.revalidate(key, compute)
+                return entry, 'stale'
+
+        CACHE_REQUESTS.labels(self.name, 'miss').inc()
+        return self.fill(key, compute), 'miss'
+
+    def build(self, key, compute):
+        generation = self.generation
+        entry = CacheEntry(generation, compute())
+        with self._lock:
+            if generation == self.generation:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def fill(self, key, compute):
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait(WAIT_SECONDS)
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry.generation == self.generation:
+                return entry
+            return self.build(key, compute)  # the leader failed, or was invalidated meanwhile
+
+        try:
+            return self.build(key, compute)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def revalidate(self, key, compute):
+        with self._lock:
+            if key in self._inflight:
+                return
+            event = self._inflight[key] = threading.Event()
+        app = current_app._get_current_object()
+
+        def run():
+            try:
+                with app.app_context():
+                    self.build(key, compute)
+            except Exception:
+                logger.exception("Refreshing %s cache entry failed", self.name)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+        threading.Thread(target=run, daemon=True, name=f'{self.name}-revalidate').start()
+
+    # Started on first use, so it runs in the gunicorn worker rather than the master
+    def watch(self):
+        if self._watching:
+            return
+        with self._lock:
+            if self._watching:
+                return
+            self._watching = True
+        threading.Thread(target=self.poll, daemon=True, name=f'{self.name}-invalidation').start()
+
+    def shared_version(self):
+        doc = meta_collection.find_one({'_id': self.version_id}, {'version': 1})
+        return doc.get('version', 0) if doc else 0
+
+    def poll(self):
+        seen = None
+        while True:
+            try:
+                version = self.shared_version()
+                if seen is not None and version != seen:
+                    self.invalidate()
+                seen = version
+            except Exception:
+                logger.exception("Polling the %s cache version failed", self.name)
+            time.sleep(POLL_SECONDS)
+
+
+listings_cache = ResponseCache('tickets', 'tickets')
+
+
+# Call after anything that changes what GET /tickets returns
+def invalidate_listings():
+    listings_cache.invalidate()
+    try:
+        meta_collection.update_one({'_id': listings_cache.version_id}, {'$inc': {'version': 1}}, upsert=True)
+    except Exception:
+        logger.exception("Bumping the shared listings cache version failed")
@@ -0,0 +1,53 @@
+import gzip
+from flask import current_app, request, Response
+
+try:
+    import brotli  # optional, enables "br" encoding
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as-is, compressing them costs more than it saves
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def compact_dumps(data):
+    # Goes through the app's JSON provider, which is compact and Mongo-type aware
+    return current_app.json.dumps(data)
+
+
+# Highest q-value the client accepts (q=0 means never); br wins a tie with gzip
+def pick_encoding():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def compress_body(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+# `encoded` memoises compressed copies of a body that is served many times (utils/response_cache.py)
+def body_response(body, status=200, compress=True, encoded=None):
+    response = Response(body, status=status, mimetype='application/json')
+
+    if compress:
+        response.vary.add('Accept-Encoding')
+        encoding = pick_encoding()
+        if encoding and len(body) >= COMPRESS_MIN_SIZE:
+            if encoded is None:
+                data = compress_body(body, encoding)
+            else:
+                data = encoded.get(encoding)
+                if data is None:
+                    data = encoded[encoding] = compress_body(body, encoding)
+            response.set_data(data)
+            response.headers['Content-Encoding'] = encoding
+
+    return response
+
+
+def json_response(data, status=200, compress=True):
+    return body_response(compact_dumps(data).encode('utf-8'), status, compress)
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import re
+import tempfile
+from dotenv import load_dotenv
+from werkzeug.security import safe_join
+
+load_dotenv()
+
+# Blob storage for uploaded images.
+#
+# Keys are content addressed: "ab/cd/<sha256>.<ext>". Identical uploads share
+# one blob, and a key never changes meaning, so blobs can be cached forever.
+# Keys under "posters/" are public and served from /posters/, everything else
+# is private and served from /uploads/ behind auth.
+#
+# There is deliberately no delete(): one blob may back several tickets (same
+# content, same key), so removing it on behalf of one owner would break the
+# others. Unreferenced blobs are left for an offline sweep.
+#
+# Files uploaded before content addressing have flat names ("<uuid>_<name>")
+# and only exist on local disk, so storage_for() keeps serving those locally
+# even when STORAGE_BACKEND=s3.
+#
+#   STORAGE_BACKEND=local  files under UPLOAD_FOLDER (default)
+#   STORAGE_BACKEND=s3     any S3-compatible store (AWS, MinIO, ...), needs boto3:
+#                          S3_BUCKET, S3_ENDPOINT_URL, S3_PREFIX, plus the usual
+#                          AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOAD_FOLDER = os.path.join(BASE_DIR, os.getenv("UPLOAD_FOLDER", "uploads"))
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024  # S3 uploads spill to disk beyond this
+PUBLIC_PREFIX = 'posters/'
+# "ab/cd/<sha256>.<ext>", optionally under posters/, and its derivatives "<sha256>.<variant>.<ext>"
+CONTENT_KEY = re.compile(r'^(posters/)?[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)+$')
+
+
+def make_key(digest, extension, prefix=''):
+    extension = extension.lower().lstrip('.')
+    return f"{prefix}{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+def is_content_key(key):
+    return bool(CONTENT_KEY.match(key))
+
+
+def key_url(key):
+    if key.startswith(PUBLIC_PREFIX):
+        return f"/posters/{key[len(PUBLIC_PREFIX):]}"
+    return f"/uploads/{key}"
+
+
+# Copy a stream in chunks, hashing as we go, so nothing is held in memory whole
+def copy_and_hash(stream, target):
+    sha = hashlib.sha256()
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        sha.update(chunk)
+        target.write(chunk)
+    return sha.hexdigest()
+
+
+class LocalStorage:
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, '.tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, key):
+        if key.startswith('.'):
+            return None  # keeps .tmp out of reach
+        return safe_join(self.root, key)
+
+    def save(self, stream, extension, prefix=''):
+        # Write to a temp file on the same filesystem, then rename into place atomically
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                digest = copy_and_hash(stream, tmp)
+            key = make_key(digest, extension, prefix)
+            final_path = self.path(key)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)  # same content already stored
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return key
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save_bytes(self, key, data):
+        # Derived files (thumbnails etc.) whose key the caller already knows
+        final_path = self.path(key)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, final_path)
+
+    def exists(self, key):
+        path = self.path(key)
+        return path is not None and os.path.isfile(path)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def url(self, key):
+        return key_url(key)
+
+
+class S3Storage:
+    name = 's3'
+
+    def __init__(self, bucket, endpoint_url=None, prefix=''):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+
+    def object_key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except ClientError:
+            return False
+
+    def save(self, stream, extension, prefix=''):
+        # The key depends on the hash, so spool first (to disk past 1MB), then upload
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+            digest = copy_and_hash(stream, spool)
+            key = make_key(digest, extension, prefix)
+            if not self.exists(key):
+                spool.seek(0)
+                self.client.upload_fileobj(spool, self.bucket, self.object_key(key))
+            return key
+
+    def save_bytes(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data)
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))['Body']
+
+    def url(self, key):
+        return key_url(key)
+
+    def presigned_url(self, key, expires_in=300):
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self.object_key(key)},
+            ExpiresIn=expires_in
+        )
+
+
+_storage = None
+_local_storage = None
+
+
+def get_local_storage():
+    global _local_storage
+    if _local_storage is None:
+        _local_storage = LocalStorage(UPLOAD_FOLDER)
+    return _local_storage
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        if os.getenv("STORAGE_BACKEND", "local") == 's3':
+            _storage = S3Storage(
+                os.getenv("S3_BUCKET"),
+                endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+                prefix=os.getenv("S3_PREFIX", "")
+            )
+        else:
+            _storage = get_local_storage()
+    return _storage
+
+
+# Where an existing key lives: legacy flat uploads stay on local disk
+def storage_for(key):
+    if is_content_key(key):
+        return get_storage()
+    return get_local_storage()
+
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
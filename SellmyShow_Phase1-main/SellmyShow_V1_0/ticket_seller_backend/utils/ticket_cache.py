@@ -0,0 +1,112 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from utils.db import db
+from utils.metrics import CACHE_REQUESTS
+
+# Per-worker LRU/TTL cache of ticket detail documents (GET /ticket/<id>).
+#
+# Entries live for at most TICKET_CACHE_TTL seconds and the least recently used
+# are dropped beyond TICKET_CACHE_MAX_ENTRIES. Writes that change a ticket call
+# invalidate_tickets(): the ticket is evicted here at once, and an invalidation
+# record lets the other workers evict it on their next poll
+# (TICKET_CACHE_POLL_SECONDS). The TTL bounds staleness if a record is missed.
+
+logger = logging.getLogger(__name__)
+
+invalidations_collection = db["cache_invalidations"]
+
+TTL_SECONDS = float(os.getenv("TICKET_CACHE_TTL", 30))
+MAX_ENTRIES = int(os.getenv("TICKET_CACHE_MAX_ENTRIES", 5000))
+POLL_SECONDS = float(os.getenv("TICKET_CACHE_POLL_SECONDS", 2))
+# Re-read a little history each poll so clock skew between hosts cannot hide a record
+POLL_OVERLAP = timedelta(seconds=10)
+RECORD_TTL_SECONDS = 3600
+
+
+class LRUCache:
+    def __init__(self, name, ttl, max_entries):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and time.monotonic() - item[0] < self.ttl:
+                self._entries.move_to_end(key)
+                CACHE_REQUESTS.labels(self.name, 'hit').inc()
+                return item[1]
+            if item is not None:
+                del self._entries[key]
+        CACHE_REQUESTS.labels(self.name, 'miss').inc()
+        return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class TicketCache(LRUCache):
+    def __init__(self):
+        super().__init__('ticket_detail', TTL_SECONDS, MAX_ENTRIES)
+        self._watching = False
+        self._watch_lock = threading.Lock()
+
+    def get(self, key):
+        self.watch()
+        return super().get(key)
+
+    # Started on first use, so it runs in the gunicorn worker rather than the master
+    def watch(self):
+        if self._watching:
+            return
+        with self._watch_lock:
+            if self._watching:
+                return
+            self._watching = True
+        threading.Thread(target=self.poll, daemon=True, name='ticket-cache-invalidation').start()
+
+    def poll(self):
+        try:
+            invalidations_collection.create_index('at', expireAfterSeconds=RECORD_TTL_SECONDS)
+        except Exception:
+            logger.exception("Creating the cache_invalidations TTL index failed")
+        since = datetime.utcnow()
+        while True:
+            time.sleep(POLL_SECONDS)
+            checked = datetime.utcnow()
+            try:
+                ids = invalidations_collection.distinct('ticket_id', {'at': {'$gte': since - POLL_OVERLAP}})
+                self.evict(ids)
+                since = checked
+            except Exception:
+                logger.exception("Polling ticket cache invalidations failed")
+
+
+ticket_cache = TicketCache()
+
+
+# Call after a write that changes what GET /ticket/<id> returns
+def invalidate_tickets(*ticket_ids):
+    if not ticket_ids:
+        return
+    ticket_cache.evict(ticket_ids)
+    now = datetime.utcnow()
+    try:
+        invalidations_collection.insert_many([{'ticket_id': t, 'at': now} for t in ticket_ids], ordered=False)
+    except Exception:
+        logger.exception("Recording ticket cache invalidations failed")